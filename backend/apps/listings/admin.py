@@ -3,6 +3,7 @@ from .models import Listing
 
 @admin.register(Listing)
 class ListingAdmin(admin.ModelAdmin):
-    list_display = ('l_id', 'title', 'location', 'price', 'rating', 'likes')
+    list_display = ('l_id', 'title', 'owner', 'location', 'price', 'rating', 'average_rating', 'review_count', 'likes')
+    list_select_related = ('owner',)
     search_fields = ('title', 'location')
     list_filter = ('location', 'rating')
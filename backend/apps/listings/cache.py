@@ -0,0 +1,135 @@
+"""
+Response cache for the public listing read endpoints.
+
+Cached entries are keyed by a version number plus the request's host and query
+string. Listing writes never delete entries; they bump the version so every old
+key becomes unreachable at once:
+
+* the ``list`` version covers every multi-listing response (feed, search, facets),
+* each listing also has its own ``detail`` version, so updating one listing only
+  invalidates that listing's detail page,
+* each owner has a ``stats`` version for their dashboard stats, bumped by writes
+  to their listings and by likes on them.
+"""
+import hashlib
+import json
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import status
+from rest_framework.response import Response
+
+LIST_VERSION_KEY = 'listings:version:list'
+
+
+def _detail_version_key(l_id):
+    return f'listings:version:detail:{l_id}'
+
+
+def _owner_stats_version_key(owner_id):
+    return f'listings:version:owner_stats:{owner_id}'
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so a version key evicted from the cache can't
+        # come back at a number that old entries were stored under.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), timeout=None)
+
+
+def invalidate_listing(l_id=None):
+    """Invalidate cached list responses and, if given, one listing's detail response."""
+    _bump_version(LIST_VERSION_KEY)
+    if l_id is not None:
+        _bump_version(_detail_version_key(l_id))
+
+
+def invalidate_owner_stats(owner_id):
+    """Invalidate the cached dashboard stats of one owner."""
+    _bump_version(_owner_stats_version_key(owner_id))
+
+
+def cached_owner_stats(owner_id, days, compute):
+    """Return ``compute()`` for this owner and window, cached until their stats version moves."""
+    version = _get_version(_owner_stats_version_key(owner_id))
+    key = f'listings:owner_stats:{owner_id}:{version}:{days}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute()
+        cache.set(key, stats, settings.LISTINGS_CACHE_TIMEOUT)
+    return stats
+
+
+def make_etag(data):
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode('utf-8')
+    return '"%s"' % hashlib.md5(payload).hexdigest()
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+
+def _not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+
+def cached_listing_response(scope):
+    """
+    Cache a DRF view's 200 responses and answer ``If-None-Match`` with 304.
+
+    ``scope`` is ``'list'`` for endpoints returning many listings and
+    ``'detail'`` for endpoints taking an ``l_id`` URL argument. Apply it
+    below ``@api_view`` so the wrapped function receives the DRF request.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped_view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view_func(request, *args, **kwargs)
+
+            if scope == 'detail':
+                version = _get_version(_detail_version_key(kwargs['l_id']))
+            else:
+                version = _get_version(LIST_VERSION_KEY)
+            query = sorted(request.query_params.lists())
+            fingerprint = hashlib.md5(
+                f'{request.get_host()}|{request.path}|{query}'.encode('utf-8')
+            ).hexdigest()
+            key = f'listings:{scope}:{view_func.__name__}:{version}:{fingerprint}'
+
+            cached = cache.get(key)
+            if cached is not None:
+                data, etag = cached
+                if _etag_matches(request, etag):
+                    return _not_modified(etag)
+                return Response(data, headers={'ETag': etag})
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            etag = make_etag(response.data)
+            cache.set(key, (response.data, etag), settings.LISTINGS_CACHE_TIMEOUT)
+            if _etag_matches(request, etag):
+                return _not_modified(etag)
+            response['ETag'] = etag
+            return response
+        return wrapped_view
+    return decorator
@@ -0,0 +1,96 @@
+import math
+import sys
+from decimal import Decimal, InvalidOperation
+from django.db.models.functions import Lower
+from .models import ListingAmenity, normalize_amenity
+
+
+class InvalidFilter(ValueError):
+    """Raised when a listing filter query parameter cannot be parsed."""
+
+
+def _number(params, name, cast):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        number = cast(value)
+        # NaN and infinities parse but can't be compared against a column
+        if math.isfinite(number):
+            return number
+    except (ValueError, InvalidOperation):
+        pass
+    raise InvalidFilter(f"'{name}' must be a number")
+
+
+def _prefix_bounds(prefix):
+    """
+    ``[low, high)`` bounds containing exactly the strings that start with
+    ``prefix``; ``high`` is None when no upper bound exists.
+    """
+    # Trailing maximal code points can't be incremented; drop them
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return prefix, None
+    return prefix, stem[:-1] + chr(ord(stem[-1]) + 1)
+
+
+def requested_amenities(params):
+    """Amenities from ``?amenities=gym,patio`` and/or repeated ``?amenity=gym``."""
+    names = params.getlist('amenity')
+    for value in params.getlist('amenities'):
+        names.extend(value.split(','))
+    return sorted({normalize_amenity(name) for name in names} - {''})
+
+
+def filter_listings(queryset, params, default_status=None):
+    """
+    Apply the listing search query parameters to ``queryset``.
+
+    Supported parameters: ``location`` (prefix match), ``min_price``,
+    ``max_price``, ``min_rating``, ``amenities``/``amenity`` (all required)
+    and ``status``. Every filter but a non-ASCII location maps to an indexed
+    column so the work stays in the database. Raises InvalidFilter for values
+    that can't be used.
+    """
+    location = params.get('location', '').strip()
+    if '\x00' in location:
+        raise InvalidFilter("'location' must not contain NUL characters")
+    if location and location.isascii():
+        # A range on LOWER(location) can use the expression index on every
+        # backend, which a case-insensitive LIKE can't; the prefix match
+        # re-checks the rows it finds
+        location = location.lower()
+        low, high = _prefix_bounds(location)
+        queryset = queryset.alias(location_lower=Lower('location')).filter(
+            location_lower__gte=low, location_lower__startswith=location,
+        )
+        if high is not None:
+            queryset = queryset.filter(location_lower__lt=high)
+    elif location:
+        # SQLite's LOWER() only folds ASCII, so bounds lowered by Python could
+        # miss rows; leave case folding to the backend's LIKE
+        queryset = queryset.filter(location__istartswith=location)
+
+    min_price = _number(params, 'min_price', Decimal)
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+    max_price = _number(params, 'max_price', Decimal)
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+
+    min_rating = _number(params, 'min_rating', float)
+    if min_rating is not None:
+        queryset = queryset.filter(rating__gte=min_rating)
+
+    for name in requested_amenities(params):
+        # Driven by the (amenity, listing) index rather than probed per listing
+        queryset = queryset.filter(
+            l_id__in=ListingAmenity.objects.filter(amenity__name=name).values('listing_id')
+        )
+
+    listing_status = params.get('status', default_status)
+    if listing_status:
+        queryset = queryset.filter(status=listing_status)
+
+    return queryset
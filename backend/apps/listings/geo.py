@@ -0,0 +1,177 @@
+"""
+Offline geocoding and spatial lookups for listings.
+
+Coordinates come from the bundled gazetteer (``data/gazetteer.csv``): a
+listing's free-text ``location`` is matched against its neighbourhood names,
+so no network call is ever made.
+
+SQLite keeps an R*Tree table (``listings_listing_rtree``) keyed by the
+listing's ``l_id``, updated from the listing signals like the search index.
+Other databases use the indexed ``Listing.geohash`` column: a bounding box is
+covered by a handful of geohash cells and each becomes a prefix range scan.
+In both cases the exact latitude/longitude bounds are checked afterwards.
+"""
+import csv
+import math
+import os
+import re
+from functools import lru_cache
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+RTREE_TABLE = 'listings_listing_rtree'
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv')
+
+GEOHASH_PRECISION = 8
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Most geohash prefixes OR-ed together for one bounding box query
+MAX_COVER_CELLS = 16
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    entries = []
+    with open(GAZETTEER_PATH, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            name = row['name'].lower()
+            entries.append((
+                re.compile(r'\b%s\b' % re.escape(name)),
+                len(name),
+                row['city'].lower(),
+                row['kind'] == 'neighbourhood',
+                float(row['latitude']),
+                float(row['longitude']),
+            ))
+    return entries
+
+
+def geocode(location):
+    """
+    Return ``(latitude, longitude)`` for a free-text location, or None.
+
+    A neighbourhood beats a city, a name whose city also appears in the text
+    beats one from another city, and longer names beat shorter ones.
+    """
+    text = ' '.join(str(location or '').lower().split())
+    if not text:
+        return None
+    best, best_score = None, None
+    for pattern, name_length, city, is_neighbourhood, latitude, longitude in gazetteer():
+        match = pattern.search(text)
+        if not match:
+            continue
+        score = (is_neighbourhood, city in text, name_length, -match.start())
+        if best_score is None or score > best_score:
+            best, best_score = (latitude, longitude), score
+    return best
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def _cell_size(precision):
+    lat_bits = 5 * precision // 2
+    lng_bits = 5 * precision - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def _steps(low, high, size):
+    value = low
+    while value < high + size:
+        yield min(value, high)
+        value += size
+
+
+def covering_geohashes(min_lat, min_lng, max_lat, max_lng):
+    """The longest geohash prefixes (at most MAX_COVER_CELLS) whose cells cover the box."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        cells = math.ceil((max_lat - min_lat) / height + 1) * math.ceil((max_lng - min_lng) / width + 1)
+        if cells <= MAX_COVER_CELLS or precision == 1:
+            return sorted({
+                encode_geohash(lat, lng, precision)
+                for lat in _steps(min_lat, max_lat, height)
+                for lng in _steps(min_lng, max_lng, width)
+            })
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi, d_lambda = phi2 - phi1, math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """A (min_lat, min_lng, max_lat, max_lng) box containing the circle."""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    d_lng = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(latitude)), 1e-6)))
+    return (
+        max(latitude - d_lat, -90.0), max(longitude - d_lng, -180.0),
+        min(latitude + d_lat, 90.0), min(longitude + d_lng, 180.0),
+    )
+
+
+def bbox_filter(min_lat, min_lng, max_lat, max_lng):
+    """A Q matching listings whose coordinates fall inside the box, through the spatial index."""
+    exact = Q(
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lng, longitude__lte=max_lng,
+    )
+    if connection.vendor == 'sqlite':
+        indexed = Q(l_id__in=RawSQL(
+            f"SELECT id FROM {RTREE_TABLE} WHERE min_lat <= %s AND max_lat >= %s "
+            f"AND min_lng <= %s AND max_lng >= %s",
+            (max_lat, min_lat, max_lng, min_lng),
+        ))
+    else:
+        indexed = Q()
+        for prefix in covering_geohashes(min_lat, min_lng, max_lat, max_lng):
+            indexed |= Q(geohash__startswith=prefix)
+    return indexed & exact
+
+
+def index_listings(listings):
+    """Insert or refresh the R*Tree rows for ``listings``; listings without coordinates are dropped."""
+    if connection.vendor != 'sqlite':
+        return
+    listings = list(listings)
+    if not listings:
+        return
+    rows = [
+        (l.l_id, l.latitude, l.latitude, l.longitude, l.longitude)
+        for l in listings if l.latitude is not None and l.longitude is not None
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {RTREE_TABLE} WHERE id = %s", [(l.l_id,) for l in listings])
+        cursor.executemany(
+            f"INSERT INTO {RTREE_TABLE} (id, min_lat, max_lat, min_lng, max_lng) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def unindex_listings(l_ids):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {RTREE_TABLE} WHERE id = %s", [(l_id,) for l_id in l_ids])
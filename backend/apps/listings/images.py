@@ -0,0 +1,224 @@
+"""
+Listing image storage and resized WebP derivatives.
+
+Uploads are content-addressed: each file is stored under MEDIA_ROOT (served
+at ``/uploads/<name>``) as ``<sha256><ext>``, so identical bytes are stored
+once. ``StoredImage`` counts how many listing references point at each file;
+``release_image`` deletes it only when the last reference goes away. Files
+without a ``StoredImage`` row are never deleted, since their references are
+unknown.
+
+A small background pool renders WebP copies at each width in
+``DERIVATIVE_WIDTHS`` under ``derivatives/``, so listing cards can load a
+thumbnail instead of the original. ``StoredImage.has_derivatives`` records
+when they are all written; until then clients are given the original.
+"""
+import hashlib
+import logging
+import os
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from PIL import Image, ImageOps, UnidentifiedImageError
+from .models import StoredImage
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+DERIVATIVE_DIR = 'derivatives'
+WEBP_QUALITY = 80
+
+# Stored names that are content hashes, and so never change content
+HASHED_NAME_RE = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]{1,5})?$')
+
+# Accepted upload formats, as detected by Pillow, and their stored extension
+IMAGE_FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+# Media types served inline; any other stored file is sent as an attachment
+INLINE_CONTENT_TYPES = frozenset({'image/jpeg', 'image/png', 'image/gif', 'image/webp'})
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='listing-images')
+
+
+def derivative_name(name, width):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f"{DERIVATIVE_DIR}/{stem}-{width}w.webp"
+
+
+def derivative_names(name):
+    """``{width: derivative_name(name, width)}`` for every DERIVATIVE_WIDTHS width."""
+    return {width: derivative_name(name, width) for width in DERIVATIVE_WIDTHS}
+
+
+class UnsupportedImage(ValueError):
+    """An upload that isn't a JPEG, PNG, GIF or WebP image."""
+
+
+def image_extension(image):
+    """
+    The stored extension for an upload, taken from the format Pillow detects
+    in its bytes rather than from the client's file name.
+    """
+    try:
+        with Image.open(image) as opened:
+            image_format = opened.format
+    except (UnidentifiedImageError, OSError):
+        image_format = None
+    finally:
+        image.seek(0)
+    if image_format not in IMAGE_FORMATS:
+        raise UnsupportedImage(f"{image.name} is not a JPEG, PNG, GIF or WebP image")
+    return IMAGE_FORMATS[image_format]
+
+
+def save_upload(image):
+    """
+    Store an upload under its content hash and add one reference to it.
+
+    Returns ``(name, created)``; ``created`` is False when identical bytes
+    were already stored, in which case nothing is written. Raises
+    UnsupportedImage for anything but the accepted image formats.
+    """
+    extension = image_extension(image)
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in image.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    name = f"{digest.hexdigest()}{extension}"
+
+    created = False
+    if not default_storage.exists(name):
+        # Storage.save reads the upload through File.chunks(), so large files
+        # are never held in memory as a whole.
+        saved = default_storage.save(name, image)
+        if saved != name:
+            # A concurrent upload of the same bytes won the race
+            default_storage.delete(saved)
+        else:
+            created = True
+
+    stored, _ = StoredImage.objects.get_or_create(
+        name=name, defaults={'sha256': digest.hexdigest(), 'size': size}
+    )
+    StoredImage.objects.filter(pk=stored.pk).update(ref_count=F('ref_count') + 1)
+    return name, created
+
+
+def save_uploads(files):
+    """
+    Store uploaded files, queue derivatives for new ones, and return their
+    names. Every file is checked first, so one bad upload stores nothing.
+    """
+    files = list(files)
+    for image in files:
+        image_extension(image)
+    names, new_names = [], []
+    for image in files:
+        name, created = save_upload(image)
+        names.append(name)
+        if created:
+            new_names.append(name)
+    schedule_derivatives(new_names)
+    return names
+
+
+def with_derivatives(names):
+    """The subset of ``names`` whose derivatives have all been written."""
+    names = list(set(names))
+    ready = set()
+    for start in range(0, len(names), 500):
+        ready.update(StoredImage.objects.filter(
+            name__in=names[start:start + 500], has_derivatives=True
+        ).values_list('name', flat=True))
+    return ready
+
+
+def generate_derivatives(name):
+    """
+    Render the WebP derivatives for one stored image and mark its StoredImage
+    as having them; returns the names written.
+    """
+    try:
+        with default_storage.open(name, 'rb') as f:
+            original = Image.open(f)
+            original = ImageOps.exif_transpose(original)
+            original.load()
+    except (FileNotFoundError, UnidentifiedImageError, OSError) as e:
+        logger.warning("Cannot create derivatives for %s: %s", name, e)
+        return []
+
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    written = []
+    for width in DERIVATIVE_WIDTHS:
+        resized = original.copy()
+        # Never upscale: small originals get a same-size WebP under every width
+        resized.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+
+        target = derivative_name(name, width)
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        written.append(default_storage.save(target, ContentFile(buffer.getvalue())))
+    StoredImage.objects.filter(name=name).update(has_derivatives=True)
+    return written
+
+
+def _generate_all(names):
+    for name in names:
+        try:
+            generate_derivatives(name)
+        except Exception:
+            logger.exception("Generating derivatives for %s failed", name)
+
+
+def schedule_derivatives(names):
+    """Generate derivatives for ``names`` on the background pool."""
+    names = list(names)
+    if names:
+        return _executor.submit(_generate_all, names)
+
+
+def delete_image(name):
+    """Remove a stored image and its derivatives."""
+    for target in [name] + [derivative_name(name, width) for width in DERIVATIVE_WIDTHS]:
+        if default_storage.exists(target):
+            default_storage.delete(target)
+
+
+def retain_images(names):
+    """
+    Add one reference per occurrence in ``names``, tracking names that have no
+    StoredImage yet (e.g. image names arriving through an import).
+    """
+    counts = Counter(names)
+    if not counts:
+        return
+    StoredImage.objects.bulk_create([StoredImage(name=name) for name in counts], ignore_conflicts=True)
+    by_count = defaultdict(list)
+    for name, count in counts.items():
+        by_count[count].append(name)
+    for count, group in by_count.items():
+        for start in range(0, len(group), 500):
+            StoredImage.objects.filter(name__in=group[start:start + 500]).update(
+                ref_count=F('ref_count') + count
+            )
+
+
+def release_image(name):
+    """
+    Drop one reference to ``name``; delete the files once nothing references
+    them, after the surrounding transaction commits.
+    """
+    with transaction.atomic():
+        StoredImage.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        if StoredImage.objects.filter(name=name, ref_count=0).delete()[0]:
+            transaction.on_commit(lambda: delete_image(name))
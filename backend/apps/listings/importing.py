@@ -0,0 +1,268 @@
+"""
+Bulk listing import from JSON, NDJSON or CSV exports.
+
+Records are parsed as a stream (a JSON array is decoded one element at a
+time), normalized, and upserted by ``l_id`` in batches with a single
+``INSERT ... ON CONFLICT`` per batch. Bulk writes skip the Listing signals,
+so each batch also syncs its ListingAmenity, ListingImage, search and
+spatial index rows and the StoredImage reference counts directly; callers
+invalidate the listing cache once at the end.
+"""
+import ast
+import csv
+import gzip
+import json
+import re
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from . import geo, images, search
+from .models import Amenity, Listing, ListingAmenity, ListingImage, as_list, normalize_amenity
+
+FORMATS = ('json', 'ndjson', 'csv')
+READ_SIZE = 1 << 16
+
+# Columns refreshed when an imported l_id already exists. Ownership, status,
+# likes and review aggregates belong to the live site and are left alone.
+UPDATE_FIELDS = [
+    'title', 'location', 'description', 'price', 'rating', 'amenities', 'image_urls',
+    'latitude', 'longitude', 'geohash', 'updated_at',
+]
+
+
+class ImportFormatError(ValueError):
+    """The input file could not be parsed."""
+
+
+def detect_format(path):
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    for ext, fmt in (('.ndjson', 'ndjson'), ('.jsonl', 'ndjson'), ('.json', 'json'), ('.csv', 'csv')):
+        if name.endswith(ext):
+            return fmt
+    raise ImportFormatError(f"Cannot tell the format of {path}; pass --format")
+
+
+def open_text(path):
+    if path.lower().endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def iter_json_array(f, read_size=READ_SIZE):
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buf = f.read(read_size).lstrip()
+    if not buf.startswith('['):
+        raise ImportFormatError("Expected a JSON array")
+    buf = buf[1:]
+    eof = False
+
+    while True:
+        buf = buf.lstrip(' \t\r\n,')
+        if buf.startswith(']'):
+            return
+        try:
+            if not buf or (not eof and len(buf) < read_size):
+                raise json.JSONDecodeError("Need more data", buf, len(buf))
+            obj, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ImportFormatError(f"Invalid JSON: {e}") from e
+            more = f.read(read_size)
+            eof = not more
+            buf += more
+            continue
+        yield obj
+        buf = buf[end:]
+
+
+def iter_ndjson(f):
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ImportFormatError(f"Invalid JSON on line {line_number}: {e}") from e
+
+
+def iter_records(f, fmt):
+    if fmt == 'json':
+        return iter_json_array(f)
+    if fmt == 'ndjson':
+        return iter_ndjson(f)
+    if fmt == 'csv':
+        return csv.DictReader(f)
+    raise ImportFormatError(f"Unknown format {fmt!r}")
+
+
+def parse_price(value):
+    """Turn prices such as ``"Ksh 12,000 "`` into a Decimal; negative prices are rejected."""
+    if isinstance(value, (int, float, Decimal)):
+        price = Decimal(str(value))
+    else:
+        text = str(value or '')
+        if '-' in text:
+            raise ValueError(f"Invalid price {value!r}")
+        try:
+            price = Decimal(re.sub(r'[^\d.]', '', text))
+        except InvalidOperation:
+            raise ValueError(f"Invalid price {value!r}")
+    if not price.is_finite() or price < 0:
+        raise ValueError(f"Invalid price {value!r}")
+    return price
+
+
+def parse_list(value):
+    """Lists arrive as JSON lists, Python-literal strings (the CSV exports) or comma-separated text."""
+    if isinstance(value, str) and value.strip().startswith('['):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                raise ValueError(f"Invalid list {value!r}")
+    return [str(item).strip() for item in as_list(value) if str(item).strip()]
+
+
+def clean_amenities(value):
+    """Collapse whitespace and drop case-insensitive duplicates, keeping first spellings."""
+    amenities, seen = [], set()
+    for name in parse_list(value):
+        key = normalize_amenity(name)
+        if key not in seen:
+            seen.add(key)
+            amenities.append(' '.join(name.split()))
+    return amenities
+
+
+def build_listing(record, owner, status='active'):
+    """Build an unsaved Listing from one raw record; raises ValueError for unusable rows."""
+    title = (record.get('title') or '').strip()
+    if not title:
+        raise ValueError("Missing title")
+
+    l_id = record.get('l_id') or record.get('id')
+    latitude, longitude = record.get('latitude'), record.get('longitude')
+    now = timezone.now()
+    listing = Listing(
+        l_id=int(l_id) if l_id not in (None, '') else None,
+        title=title[:255],
+        location=(record.get('location') or '').strip()[:255],
+        description=(record.get('description') or '').strip(),
+        price=parse_price(record.get('price')),
+        rating=float(record.get('rating') or 0),
+        amenities=clean_amenities(record.get('amenities')),
+        image_urls=parse_list(record.get('image_urls', record.get('imageUrls'))),
+        owner=owner,
+        status=status,
+        latitude=float(latitude) if latitude not in (None, '') else None,
+        longitude=float(longitude) if longitude not in (None, '') else None,
+        created_at=now,
+        updated_at=now,
+    )
+    listing.locate()
+    return listing
+
+
+def _insert_rows(model, fields, rows):
+    # Plain executemany: building a model instance per join row costs more
+    # than the insert itself at import sizes.
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(field).column) for field in fields)
+    sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+        quote(model._meta.db_table), columns, ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def _sync_amenities(listings):
+    """Bulk version of Listing.sync_amenities for one batch."""
+    names = {
+        listing.l_id: {normalize_amenity(name) for name in listing.amenities} - {''}
+        for listing in listings
+    }
+    all_names = set().union(*names.values())
+    Amenity.objects.bulk_create([Amenity(name=name) for name in all_names], ignore_conflicts=True)
+    amenity_ids = dict(Amenity.objects.filter(name__in=all_names).values_list('name', 'id'))
+
+    ListingAmenity.objects.filter(listing_id__in=names).delete()
+    _insert_rows(ListingAmenity, ['listing', 'amenity'], [
+        (l_id, amenity_ids[name])
+        for l_id, listing_names in names.items()
+        for name in listing_names
+    ])
+
+
+def _sync_images(listings):
+    """Bulk version of Listing.sync_images for one batch."""
+    ListingImage.objects.filter(listing_id__in=[listing.l_id for listing in listings]).delete()
+    _insert_rows(ListingImage, ['listing', 'name', 'position'], [
+        (listing.l_id, name, position)
+        for listing in listings
+        for position, name in enumerate(listing.image_urls)
+    ])
+
+
+def _sync_image_references(listings, previous_images):
+    """Reference the image names each listing gained and release the ones an upsert replaced."""
+    added, removed = Counter(), Counter()
+    for listing in listings:
+        new = Counter(listing.image_urls)
+        old = Counter(as_list(previous_images.get(listing.l_id)))
+        added += new - old
+        removed += old - new
+    images.retain_images(added.elements())
+    for name in removed.elements():
+        images.release_image(name)
+
+
+def write_batch(listings, owner_ids=None):
+    """
+    Upsert one batch of listings by l_id and refresh their derived rows.
+
+    When ``owner_ids`` (a set) is given, the owners of every written row are
+    added to it; rows that already existed keep their original owner.
+    """
+    # A row may not be upserted twice in one statement; the last copy wins
+    by_id = {listing.l_id: listing for listing in listings if listing.l_id is not None}
+    listings = list(by_id.values()) + [listing for listing in listings if listing.l_id is None]
+
+    options = {'update_conflicts': True, 'update_fields': UPDATE_FIELDS}
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['l_id']
+
+    with transaction.atomic():
+        previous = Listing.objects.filter(l_id__in=by_id).values_list('l_id', 'image_urls', 'owner_id')
+        previous_images = {}
+        for l_id, image_urls, owner_id in previous:
+            previous_images[l_id] = image_urls
+            if owner_ids is not None:
+                owner_ids.add(owner_id)
+        if owner_ids is not None:
+            owner_ids.update(listing.owner_id for listing in listings if listing.l_id not in previous_images)
+        Listing.objects.bulk_create(listings, **options)
+        _sync_image_references(listings, previous_images)
+        # Backends that can't return ids leave rows without an l_id unset
+        saved = [listing for listing in listings if listing.l_id is not None]
+        _sync_amenities(saved)
+        _sync_images(saved)
+        search.index_listings(saved)
+        geo.index_listings(saved)
+    return len(listings)
+
+
+def reset_sequences():
+    """Move the l_id sequence past explicitly imported ids (PostgreSQL, Oracle)."""
+    statements = connection.ops.sequence_reset_sql(no_style(), [Listing])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,153 @@
+import csv
+import gzip
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from apps.listings.models import Listing
+from apps.reviews.models import Review
+from apps.wishlist.models import Wishlist
+
+
+def _listings():
+    return Listing.objects.order_by('l_id').values(
+        'l_id', 'title', 'location', 'description', 'price', 'rating', 'amenities', 'image_urls',
+        'likes', 'review_count', 'average_rating', 'status', 'created_at', 'updated_at',
+        owner_uid=F('owner__uid'),
+    )
+
+
+def _reviews():
+    return Review.objects.order_by('review_id').values(
+        'review_id', 'user', 'rating', 'comment', 'created_at', l_id=F('listing_id'),
+    )
+
+
+def _wishlist():
+    return Wishlist.objects.order_by('id').values('id', 'created_at', user_uid=F('user__uid'), l_id=F('listing_id'))
+
+
+# name -> (queryset factory, column used for incremental exports)
+DATASETS = {
+    'listings': (_listings, 'updated_at'),
+    'reviews': (_reviews, 'created_at'),
+    'wishlist': (_wishlist, 'created_at'),
+}
+
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream listings, reviews and wishlist rows to NDJSON or CSV files. With --since or "
+        "--watermark-file only rows created/updated after the watermark are exported; "
+        "deletions (including removed wishlist entries) are not captured by incremental exports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('datasets', nargs='*', help=f"Datasets to export: {', '.join(DATASETS)} (default: all)")
+        parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help="Compress output files with gzip")
+        parser.add_argument('--output-dir', default='.')
+        parser.add_argument('--since', help="Only export rows changed after this ISO timestamp")
+        parser.add_argument(
+            '--watermark-file',
+            help="JSON file holding the last exported timestamp per dataset; read before and updated after the export",
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        datasets = options['datasets'] or list(DATASETS)
+        unknown = set(datasets) - set(DATASETS)
+        if unknown:
+            raise CommandError(f"Unknown datasets: {', '.join(sorted(unknown))}")
+        watermarks = self._read_watermarks(options['watermark_file'])
+        since = self._parse_since(options['since']) if options['since'] else None
+        # Rows written after this instant are left for the next run
+        cutoff = timezone.now()
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for name in datasets:
+            factory, watermark_field = DATASETS[name]
+            queryset = factory()
+            if watermark_field:
+                dataset_since = since or self._parse_since(watermarks.get(name))
+                if dataset_since:
+                    queryset = queryset.filter(**{f'{watermark_field}__gt': dataset_since})
+                queryset = queryset.filter(**{f'{watermark_field}__lte': cutoff})
+                watermarks[name] = cutoff.isoformat()
+
+            path = self._path(options, name)
+            columns = list(queryset.query.values_select) + list(queryset.query.annotation_select)
+            count = self._write(queryset.iterator(chunk_size=options['chunk_size']), columns, path, options)
+            self.stdout.write(f"{name}: {count} rows -> {path}")
+
+        if options['watermark_file']:
+            self._write_watermarks(options['watermark_file'], watermarks)
+        self.stdout.write(self.style.SUCCESS(f"Exported {len(datasets)} datasets"))
+
+    def _path(self, options, name):
+        filename = f"{name}.{options['format']}"
+        if options['gzip']:
+            filename += '.gz'
+        return os.path.join(options['output_dir'], filename)
+
+    def _open(self, path, options):
+        if options['gzip']:
+            return gzip.open(path, 'wt', encoding='utf-8', newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+
+    def _write(self, rows, columns, path, options):
+        # Write next to the target and rename, so readers never see a partial file
+        tmp_path = path + '.tmp'
+        count = 0
+        try:
+            with self._open(tmp_path, options) as f:
+                if options['format'] == 'ndjson':
+                    for row in rows:
+                        f.write(json.dumps(row, cls=DjangoJSONEncoder))
+                        f.write('\n')
+                        count += 1
+                else:
+                    writer = csv.DictWriter(f, fieldnames=columns)
+                    writer.writeheader()
+                    for row in rows:
+                        writer.writerow({key: _csv_value(value) for key, value in row.items()})
+                        count += 1
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return count
+
+    def _parse_since(self, value):
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            raise CommandError(f"Invalid timestamp {value!r}; use ISO 8601, e.g. 2025-01-31T00:00:00Z")
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since, timezone.get_default_timezone())
+        return since
+
+    def _read_watermarks(self, path):
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError as e:
+            raise CommandError(f"Invalid watermark file {path}: {e}")
+
+    def _write_watermarks(self, path, watermarks):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(watermarks, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.listings.images import generate_derivatives
+from apps.listings.models import ListingImage
+
+
+class Command(BaseCommand):
+    help = "Render the WebP thumbnails for listing images uploaded before derivatives existed"
+
+    def handle(self, *args, **options):
+        names = set(ListingImage.objects.values_list('name', flat=True).order_by().distinct())
+
+        done = 0
+        for name in sorted(names):
+            if generate_derivatives(name):
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {done} of {len(names)} images"))
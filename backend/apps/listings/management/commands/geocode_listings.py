@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.listings import geo
+from apps.listings.cache import invalidate_listing
+from apps.listings.models import Listing
+
+
+class Command(BaseCommand):
+    help = "Fill in listing coordinates from the bundled gazetteer and rebuild the spatial index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Re-geocode listings that already have coordinates")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        listings = Listing.objects.only('l_id', 'location', 'latitude', 'longitude', 'geohash').order_by('l_id')
+        located = missing = 0
+        batch = []
+
+        def flush():
+            with transaction.atomic():
+                Listing.objects.bulk_update(batch, ['latitude', 'longitude', 'geohash'])
+                geo.index_listings(batch)
+
+        for listing in listings.iterator(chunk_size=options['batch_size']):
+            if options['all']:
+                listing.latitude = listing.longitude = None
+            listing.locate()
+            if listing.latitude is None:
+                missing += 1
+            else:
+                located += 1
+            batch.append(listing)
+            if len(batch) >= options['batch_size']:
+                flush()
+                batch = []
+        if batch:
+            flush()
+
+        invalidate_listing()
+        self.stdout.write(self.style.SUCCESS(
+            f"Located {located} listings; {missing} locations did not match the gazetteer"
+        ))
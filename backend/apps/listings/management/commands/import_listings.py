@@ -0,0 +1,72 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from apps.listings import importing
+from apps.listings.cache import invalidate_listing, invalidate_owner_stats
+from apps.listings.models import Listing
+
+
+class Command(BaseCommand):
+    help = "Import or update listings in bulk from a JSON, NDJSON or CSV file (optionally gzipped)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, e.g. listings.csv or listings.json.gz")
+        parser.add_argument('--owner', required=True, help="uid, email or username of the owner for new listings")
+        parser.add_argument('--format', choices=importing.FORMATS, help="Input format; guessed from the extension by default")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--status', choices=[choice for choice, _ in Listing.STATUS_CHOICES], default='active')
+
+    def handle(self, *args, **options):
+        owner = get_user_model().objects.filter(
+            Q(uid=options['owner']) | Q(email=options['owner']) | Q(username=options['owner'])
+        ).first()
+        if owner is None:
+            raise CommandError(f"No user matches --owner {options['owner']!r}")
+
+        path = options['path']
+        self.verbosity = options['verbosity']
+        batch_size = max(options['batch_size'], 1)
+        started = time.monotonic()
+        imported = skipped = 0
+        batch = []
+        # Upserted rows keep their owners, whose stats change too
+        owner_ids = set()
+
+        try:
+            fmt = options['format'] or importing.detect_format(path)
+            with importing.open_text(path) as f:
+                for number, record in enumerate(importing.iter_records(f, fmt), 1):
+                    try:
+                        batch.append(importing.build_listing(record, owner, options['status']))
+                    except (ValueError, TypeError, AttributeError) as e:
+                        skipped += 1
+                        self.stderr.write(f"Skipping record {number}: {e}")
+                        continue
+
+                    if len(batch) >= batch_size:
+                        imported += importing.write_batch(batch, owner_ids)
+                        batch = []
+                        self._progress(imported, started)
+
+                if batch:
+                    imported += importing.write_batch(batch, owner_ids)
+        except (OSError, importing.ImportFormatError) as e:
+            raise CommandError(str(e))
+        finally:
+            if imported:
+                importing.reset_sequences()
+                invalidate_listing()
+                for owner_id in owner_ids:
+                    invalidate_owner_stats(owner_id)
+
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else imported
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} listings ({skipped} skipped) in {elapsed:.1f}s, {rate:.0f} rows/s"
+        ))
+
+    def _progress(self, imported, started):
+        if self.verbosity >= 2:
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"{imported} listings, {imported / elapsed:.0f} rows/s")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.listings.cache import invalidate_listing
+from apps.listings.models import Listing
+from apps.wishlist.models import Wishlist
+
+
+def reconcile_likes():
+    """Reset Listing.likes to the number of wishlists holding each listing; returns the rows fixed."""
+    wishlisted = Wishlist.objects.filter(listing=OuterRef('l_id')).order_by().values('listing')
+    actual = Coalesce(
+        Subquery(wishlisted.annotate(n=Count('*')).values('n'), output_field=IntegerField()), 0
+    )
+    # Only rows that drifted are written, and marked changed for incremental exports
+    return Listing.objects.annotate(actual=actual).exclude(likes=actual).update(
+        likes=actual, updated_at=timezone.now()
+    )
+
+
+class Command(BaseCommand):
+    help = "Recompute listing like counts from the users' wishlists"
+
+    def handle(self, *args, **options):
+        fixed = reconcile_likes()
+        if fixed:
+            invalidate_listing()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled likes for {fixed} listings"))
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_listing_amenities(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    Amenity = apps.get_model('listings', 'Amenity')
+    ListingAmenity = apps.get_model('listings', 'ListingAmenity')
+
+    amenity_ids = {}
+    rows = []
+    for l_id, amenities in Listing.objects.values_list('l_id', 'amenities').iterator():
+        if isinstance(amenities, str):
+            amenities = amenities.split(',')
+        names = {' '.join(str(name).split()).lower() for name in amenities or []} - {''}
+        for name in names:
+            if name not in amenity_ids:
+                amenity_ids[name] = Amenity.objects.get_or_create(name=name)[0].id
+            rows.append(ListingAmenity(listing_id=l_id, amenity_id=amenity_ids[name]))
+    ListingAmenity.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_alter_listing_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Amenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ListingAmenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['location'], name='listings_li_locatio_4bc07d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['price'], name='listings_li_price_d6caaa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['rating'], name='listings_li_rating_cabf52_idx'),
+        ),
+        migrations.AddField(
+            model_name='listingamenity',
+            name='amenity',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listing_amenities', to='listings.amenity'),
+        ),
+        migrations.AddField(
+            model_name='listingamenity',
+            name='listing',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listing_amenities', to='listings.listing'),
+        ),
+        migrations.AddIndex(
+            model_name='listingamenity',
+            index=models.Index(fields=['amenity', 'listing'], name='listings_li_amenity_4f50b8_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='listingamenity',
+            constraint=models.UniqueConstraint(fields=('listing', 'amenity'), name='unique_listing_amenity'),
+        ),
+        migrations.RunPython(backfill_listing_amenities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS listings_listing_fts "
+            "USING fts5(title, location, description, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "INSERT INTO listings_listing_fts (rowid, title, location, description) "
+            "SELECT l_id, title, location, description FROM listings_listing"
+        )
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            "CREATE FULLTEXT INDEX listings_listing_fulltext "
+            "ON listings_listing (title, location, description)"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX listings_listing_search_gin ON listings_listing USING GIN ("
+            "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(location, '') "
+            "|| ' ' || coalesce(description, '')))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS listings_listing_fts")
+    elif vendor == 'mysql':
+        schema_editor.execute("DROP INDEX listings_listing_fulltext ON listings_listing")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS listings_listing_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_listing_amenities_and_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
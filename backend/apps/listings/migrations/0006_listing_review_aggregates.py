@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:21
+
+from django.db import migrations, models
+
+
+def backfill_review_aggregates(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    Review = apps.get_model('reviews', 'Review')
+
+    totals = Review.objects.values('l_id').annotate(
+        count=models.Count('review_id'), total=models.Sum('rating')
+    ).order_by()
+    for row in totals.iterator():
+        Listing.objects.filter(l_id=row['l_id']).update(
+            review_count=row['count'],
+            rating_sum=row['total'],
+            average_rating=row['total'] / row['count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_listing_search_index'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='average_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_review_aggregates, migrations.RunPython.noop),
+    ]
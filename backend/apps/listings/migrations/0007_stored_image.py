@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:27
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def backfill_stored_images(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    StoredImage = apps.get_model('listings', 'StoredImage')
+
+    references = Counter()
+    for image_urls in Listing.objects.values_list('image_urls', flat=True).iterator():
+        if isinstance(image_urls, str):
+            image_urls = image_urls.split(',')
+        references.update(name.strip() for name in image_urls or [] if name.strip())
+
+    StoredImage.objects.bulk_create(
+        [StoredImage(name=name, ref_count=count) for name, count in references.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_listing_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(blank=True, max_length=64, null=True, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_stored_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_listing_updated_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['owner', 'created_at'], name='listings_li_owner_i_d4b6f0_idx'),
+        ),
+    ]
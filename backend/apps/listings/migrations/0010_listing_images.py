@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def normalize_listings(apps, schema_editor):
+    """Rewrite comma-separated amenities/image_urls as lists and fill ListingImage."""
+    Listing = apps.get_model('listings', 'Listing')
+    ListingImage = apps.get_model('listings', 'ListingImage')
+
+    changed, images = [], []
+    rows = Listing.objects.values_list('l_id', 'amenities', 'image_urls')
+    for l_id, amenities, image_urls in rows.iterator(chunk_size=1000):
+        clean_amenities, clean_images = _as_list(amenities), _as_list(image_urls)
+        if clean_amenities != amenities or clean_images != image_urls:
+            changed.append(Listing(l_id=l_id, amenities=clean_amenities, image_urls=clean_images))
+        images.extend(
+            ListingImage(listing_id=l_id, name=name, position=position)
+            for position, name in enumerate(clean_images)
+        )
+
+    Listing.objects.bulk_update(changed, ['amenities', 'image_urls'], batch_size=500)
+    ListingImage.objects.bulk_create(images, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0009_listing_owner_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='listings.listing')),
+            ],
+            options={
+                'ordering': ['position'],
+                'indexes': [models.Index(fields=['name'], name='listings_li_name_0a4312_idx')],
+                'constraints': [models.UniqueConstraint(fields=('listing', 'position'), name='unique_listing_image_position')],
+            },
+        ),
+        migrations.RunPython(normalize_listings, migrations.RunPython.noop),
+    ]
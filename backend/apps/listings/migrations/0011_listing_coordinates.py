@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+def create_rtree(apps, schema_editor):
+    # Other backends use the geohash column's index instead
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS listings_listing_rtree "
+            "USING rtree(id, min_lat, max_lat, min_lng, max_lng)"
+        )
+
+
+def drop_rtree(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS listings_listing_rtree")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0010_listing_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(create_rtree, drop_rtree),
+    ]
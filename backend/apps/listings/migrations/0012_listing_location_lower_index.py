@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:55
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_listing_coordinates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(django.db.models.functions.text.Lower('location'), name='listings_location_lower_idx'),
+        ),
+    ]
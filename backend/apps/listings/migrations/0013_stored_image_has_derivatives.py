@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:01
+
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+# The derivative widths and naming at the time of this migration
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+
+
+def mark_existing_derivatives(apps, schema_editor):
+    StoredImage = apps.get_model('listings', 'StoredImage')
+
+    ready = []
+    for image in StoredImage.objects.only('pk', 'name').iterator():
+        stem = os.path.splitext(os.path.basename(image.name))[0]
+        if all(default_storage.exists(f"derivatives/{stem}-{width}w.webp") for width in DERIVATIVE_WIDTHS):
+            ready.append(image.pk)
+    for start in range(0, len(ready), 500):
+        StoredImage.objects.filter(pk__in=ready[start:start + 500]).update(has_derivatives=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0012_listing_location_lower_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedimage',
+            name='has_derivatives',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_existing_derivatives, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,23 @@
 from django.db import models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast, Lower
 from django.conf import settings
+from django.utils import timezone
+
+
+def as_list(value):
+    """Return a JSON list column as a list, splitting legacy comma-separated strings."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    return list(value)
+
+
+def normalize_amenity(name):
+    """Canonical form used to index and filter amenities."""
+    return ' '.join(str(name).split()).lower()
+
 
 class Listing(models.Model):
     l_id = models.AutoField(primary_key=True)  # Ensure it's an auto-incrementing primary key
@@ -11,6 +29,16 @@ class Listing(models.Model):
     amenities = models.JSONField(default=list)
     image_urls = models.JSONField(default=list)
     likes = models.IntegerField(default=0)
+
+    # Coordinates, geocoded from ``location`` unless given (see geo.py)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False)
+
+    # Review aggregates, maintained by the review views (see record_review)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
     
     # Add owner relationship
     owner = models.ForeignKey(
@@ -37,13 +65,165 @@ class Listing(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['owner', 'status']),
+            models.Index(fields=['owner', 'created_at']),
             models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['location']),
+            models.Index(Lower('location'), name='listings_location_lower_idx'),
+            models.Index(fields=['price']),
+            models.Index(fields=['rating']),
+            models.Index(fields=['updated_at']),
         ]
 
     def __str__(self):
-        return f"{self.title} - {self.owner.username}"
-    
-    @property
-    def owner_id(self):
-        """Return the owner's UID for compatibility with existing code"""
-        return self.owner.uid if self.owner else None
\ No newline at end of file
+        # No owner here: rendering a list of listings mustn't query each owner
+        return f"{self.title} (#{self.l_id})"
+
+    @classmethod
+    def record_review(cls, l_id, rating, count=1):
+        """
+        Add (``count=1``) or remove (``count=-1``) one review's rating from the
+        listing's aggregates in a single UPDATE, so concurrent reviews can't
+        overwrite each other's totals. ``updated_at`` is bumped by hand
+        (``update()`` skips ``auto_now``) so incremental exports see the change.
+        """
+        new_count = F('review_count') + count
+        new_sum = F('rating_sum') + rating * count
+        return cls.objects.filter(l_id=l_id).update(
+            review_count=new_count,
+            rating_sum=new_sum,
+            updated_at=timezone.now(),
+            # Every right-hand side sees the pre-update row, so recompute the
+            # average from the same expressions rather than the new columns.
+            average_rating=Case(
+                When(review_count=-count, then=Value(0.0)),
+                default=Cast(new_sum, FloatField()) / Cast(new_count, FloatField()),
+                output_field=FloatField(),
+            ),
+        )
+
+    @classmethod
+    def record_like(cls, l_id, count=1):
+        """
+        Add (``count=1``) or remove (``count=-1``) likes in a single UPDATE.
+        The counter never drops below zero; ``reconcile_likes`` repairs drift.
+        Like ``record_review`` it bumps ``updated_at`` for incremental exports.
+        """
+        listings = cls.objects.filter(l_id=l_id)
+        if count < 0:
+            listings = listings.filter(likes__gte=-count)
+        return listings.update(likes=F('likes') + count, updated_at=timezone.now())
+
+    def normalize_lists(self):
+        """Store amenities and image_urls as clean lists, whatever form they were assigned in."""
+        self.amenities = as_list(self.amenities)
+        self.image_urls = as_list(self.image_urls)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so locate() can tell when the location text was edited
+        instance._loaded_location = tuple(
+            instance.__dict__.get(name) for name in ('location', 'latitude', 'longitude')
+        )
+        return instance
+
+    def locate(self):
+        """Geocode ``location`` when no coordinates were given and refresh the geohash."""
+        from .geo import encode_geohash, geocode
+
+        loaded = getattr(self, '_loaded_location', None)
+        if loaded and self.location != loaded[0] and (self.latitude, self.longitude) == loaded[1:]:
+            # The location moved but the coordinates are still the old ones
+            self.latitude = self.longitude = None
+        if self.latitude is None or self.longitude is None:
+            self.latitude, self.longitude = geocode(self.location) or (None, None)
+        if self.latitude is None:
+            self.geohash = ''
+        else:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+
+    def sync_images(self):
+        """Mirror the image_urls list into the ordered ListingImage table."""
+        ListingImage.objects.filter(listing=self).delete()
+        ListingImage.objects.bulk_create([
+            ListingImage(listing=self, name=name, position=position)
+            for position, name in enumerate(as_list(self.image_urls))
+        ])
+
+    def sync_amenities(self):
+        """Mirror the amenities JSON list into the indexed ListingAmenity table."""
+        names = {normalize_amenity(name) for name in as_list(self.amenities)} - {''}
+        Amenity.objects.bulk_create([Amenity(name=name) for name in names], ignore_conflicts=True)
+        amenity_ids = list(Amenity.objects.filter(name__in=names).values_list('id', flat=True))
+
+        ListingAmenity.objects.filter(listing=self).exclude(amenity_id__in=amenity_ids).delete()
+        ListingAmenity.objects.bulk_create(
+            [ListingAmenity(listing=self, amenity_id=amenity_id) for amenity_id in amenity_ids],
+            ignore_conflicts=True,
+        )
+
+
+class Amenity(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class ListingAmenity(models.Model):
+    """One row per (listing, amenity) so amenity filters are index lookups."""
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='listing_amenities')
+    amenity = models.ForeignKey(Amenity, on_delete=models.CASCADE, related_name='listing_amenities')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'amenity'], name='unique_listing_amenity'),
+        ]
+        indexes = [
+            models.Index(fields=['amenity', 'listing']),
+        ]
+
+    def __str__(self):
+        return f"{self.listing_id} - {self.amenity_id}"
+
+
+class ListingImage(models.Model):
+    """One listing image; ``position`` 0 is the cover image."""
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='images')
+    name = models.CharField(max_length=255)
+    position = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'position'], name='unique_listing_image_position'),
+        ]
+        indexes = [
+            models.Index(fields=['name']),
+        ]
+
+    def __str__(self):
+        return f"{self.listing_id} #{self.position}: {self.name}"
+
+
+class StoredImage(models.Model):
+    """
+    One stored upload, named by the SHA-256 of its bytes.
+
+    ``ref_count`` is the number of listing image references to ``name``; the
+    file is deleted when it drops to zero. Images uploaded before content
+    addressing keep their original name and have no ``sha256``.
+    ``has_derivatives`` is set once every WebP derivative has been written.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    has_derivatives = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
@@ -1,29 +1,53 @@
 from django.http import JsonResponse
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db import models
+from .cache import invalidate_owner_stats
 from .models import Listing
-from .serializers import ListingSerializer
+from .pagination import ListingCursorPagination
+from .stats import DEFAULT_DAYS, MAX_DAYS, owner_listing_stats
+from .renderers import LISTING_RENDERERS
+from .serializers import ListingRows, ListingSerializer
 from apps.users.clerk_auth import clerk_auth_required, require_role
 
 
 @api_view(['GET'])
+@renderer_classes(LISTING_RENDERERS)
 @clerk_auth_required
 @require_role(['owner', 'admin'])
 def get_owner_listings(request):
-    """Get listings that belong to the current owner"""
+    """
+    Get listings that belong to the current owner, newest first.
+
+    Passing ``page_size`` or ``cursor`` returns one cursor-paginated page with
+    ``next``/``previous`` links; ``count`` is only included on the first page.
+    """
     try:
         # Get the current user (owner)
         current_user = request.user
         
-        # Filter listings by owner using the ForeignKey relationship
-        listings = Listing.objects.filter(owner=current_user).order_by('-created_at')
-        
-        serializer = ListingSerializer(listings, many=True)
+        # Filter listings by owner using the ForeignKey relationship; pages
+        # walk the (owner, created_at) index
+        listings = Listing.objects.filter(owner=current_user)
+        rows = ListingRows(request)
+
+        if 'page_size' in request.query_params or 'cursor' in request.query_params:
+            paginator = ListingCursorPagination()
+            page = paginator.paginate_queryset(rows.values(listings), request)
+            body = {
+                'listings': rows.serialize(page),
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'owner': current_user.username,
+            }
+            if 'cursor' not in request.query_params:
+                body['count'] = listings.count()
+            return Response(body)
+
+        data = rows.serialize(rows.values(listings.order_by('-created_at', '-l_id')))
         return Response({
-            'listings': serializer.data,
-            'count': listings.count(),
+            'listings': data,
+            'count': len(data),
             'owner': current_user.username
         })
         
@@ -54,6 +78,7 @@ def create_owner_listing(request):
         if serializer.is_valid():
             # Save with the current user as owner
             listing = serializer.save(owner=current_user)
+            invalidate_owner_stats(current_user.pk)
             
             # Return the created listing
             response_serializer = ListingSerializer(listing)
@@ -88,6 +113,7 @@ def update_owner_listing(request, listing_id):
         
         if serializer.is_valid():
             serializer.save()
+            invalidate_owner_stats(current_user.pk)
             return Response(serializer.data)
         else:
             return Response(serializer.errors, status=400)
@@ -109,6 +135,7 @@ def delete_owner_listing(request, listing_id):
         listing = get_object_or_404(Listing, l_id=listing_id, owner=current_user)
         
         listing.delete()
+        invalidate_owner_stats(current_user.pk)
         return Response({"message": "Listing deleted successfully"}, status=204)
         
     except Listing.DoesNotExist:
@@ -120,24 +147,15 @@ def delete_owner_listing(request, listing_id):
 @clerk_auth_required
 @require_role(['owner', 'admin'])
 def get_owner_listing_stats(request):
-    """Get statistics for owner's listings"""
+    """Get statistics for owner's listings, with a per-day series for the last ``?days=`` days"""
     try:
-        current_user = request.user
-        listings = Listing.objects.filter(owner=current_user)
-        
-        stats = {
-            'total_listings': listings.count(),
-            'active_listings': listings.filter(status='active').count(),
-            'inactive_listings': listings.filter(status='inactive').count(),
-            'pending_listings': listings.filter(status='pending').count(),
-            'archived_listings': listings.filter(status='archived').count(),
-            'total_likes': sum(listing.likes for listing in listings),
-            'average_rating': listings.aggregate(
-                avg_rating=models.Avg('rating')
-            )['avg_rating'] or 0,
-        }
-        
-        return Response(stats)
-        
+        days = int(request.query_params.get('days', DEFAULT_DAYS))
+    except ValueError:
+        return Response({"error": "days must be a number"}, status=400)
+    if not 1 <= days <= MAX_DAYS:
+        return Response({"error": f"days must be between 1 and {MAX_DAYS}"}, status=400)
+
+    try:
+        return Response(owner_listing_stats(request.user, days))
     except Exception as e:
-        return Response({"error": str(e)}, status=500)
\ No newline at end of file
+        return Response({"error": str(e)}, status=500)
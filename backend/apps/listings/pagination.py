@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ListingCursorPagination(CursorPagination):
+    """Keyset pagination for the public listing feed.
+
+    Pages are ordered newest first, which together with a ``status`` filter
+    walks the ``(status, created_at)`` index instead of sorting the table.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-l_id')
@@ -0,0 +1,103 @@
+"""
+Full-text search over listing title, location and description.
+
+SQLite keeps a separate FTS5 table (``listings_listing_fts``) whose rowid is the
+listing's ``l_id``; it is updated row by row from the listing signals. MySQL and
+PostgreSQL use native full-text indexes on the listing table itself, which the
+database maintains on every write, so ``index_listings``/``unindex_listings``
+are no-ops there.
+"""
+import re
+from django.db import connection
+
+FTS_TABLE = 'listings_listing_fts'
+
+# Column weights for ranking: a hit in the title counts more than in the text
+TITLE_WEIGHT, LOCATION_WEIGHT, DESCRIPTION_WEIGHT = 10.0, 5.0, 1.0
+
+TSVECTOR_SQL = (
+    "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(location, '') "
+    "|| ' ' || coalesce(description, ''))"
+)
+
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _fts5_query(query):
+    # Quote every term so user input can't inject FTS5 syntax, and prefix-match
+    # the last one so results appear while the user is still typing.
+    terms = [f'"{term}"' for term in _terms(query)]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def index_listings(listings):
+    """Insert or refresh the search rows for ``listings``."""
+    if connection.vendor != 'sqlite':
+        return
+    rows = [(l.l_id, l.title, l.location, l.description) for l in listings]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, location, description) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def unindex_listings(l_ids):
+    """Drop the search rows for the given listing ids."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(l_id,) for l_id in l_ids])
+
+
+def search_listing_ids(query, status='active', limit=20, offset=0):
+    """Return listing ids matching ``query``, best match first."""
+    if not _terms(query):
+        return []
+
+    if connection.vendor == 'sqlite':
+        sql = f"""
+            SELECT l.l_id FROM {FTS_TABLE} f
+            JOIN listings_listing l ON l.l_id = f.rowid
+            WHERE {FTS_TABLE} MATCH %s AND l.status = %s
+            ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, {LOCATION_WEIGHT}, {DESCRIPTION_WEIGHT})
+            LIMIT %s OFFSET %s
+        """
+        params = [_fts5_query(query), status, limit, offset]
+    elif connection.vendor == 'mysql':
+        sql = """
+            SELECT l_id FROM listings_listing
+            WHERE MATCH (title, location, description) AGAINST (%s IN NATURAL LANGUAGE MODE)
+              AND status = %s
+            ORDER BY MATCH (title, location, description) AGAINST (%s IN NATURAL LANGUAGE MODE) DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [query, status, query, limit, offset]
+    elif connection.vendor == 'postgresql':
+        sql = f"""
+            SELECT l_id FROM listings_listing
+            WHERE {TSVECTOR_SQL} @@ plainto_tsquery('english', %s) AND status = %s
+            ORDER BY ts_rank({TSVECTOR_SQL}, plainto_tsquery('english', %s)) DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [query, status, query, limit, offset]
+    else:
+        from django.db.models import Q
+        from .models import Listing
+
+        match = Q()
+        for term in _terms(query):
+            match &= Q(title__icontains=term) | Q(location__icontains=term) | Q(description__icontains=term)
+        qs = Listing.objects.filter(match, status=status).values_list('l_id', flat=True)
+        return list(qs[offset:offset + limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
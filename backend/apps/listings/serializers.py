@@ -1,27 +1,226 @@
-from rest_framework import serializers
-from .models import Listing
+from functools import cached_property
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import Listing, ListingImage, StoredImage
+from .images import DERIVATIVE_WIDTHS, derivative_name, derivative_names, with_derivatives
 
-class ListingSerializer(serializers.ModelSerializer):
+# Derivative width used for card thumbnails
+CARD_THUMBNAIL_WIDTH = DERIVATIVE_WIDTHS[0]
+
+
+def media_base_url(request=None):
+    """The URL prefix of uploaded files, absolute when a request is given."""
+    if request:
+        return request.build_absolute_uri('/').rstrip('/') + '/uploads/'
+    return '/uploads/'
+
+
+def image_srcset(base_url, name, has_derivatives):
+    """
+    The URL of image ``name`` at each derivative width, or of the original at
+    every width while its derivatives don't exist yet.
+    """
+    if not has_derivatives:
+        return dict.fromkeys(map(str, DERIVATIVE_WIDTHS), base_url + name)
+    return {str(width): base_url + derivative for width, derivative in derivative_names(name).items()}
+
+
+class SparseFieldsMixin:
+    """Accept a ``fields`` argument naming the only fields to output."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class DerivativesMixin:
+    """Know which images of the serialized listings have their derivatives."""
+
+    @cached_property
+    def _with_derivatives(self):
+        # Looked up once for all the listings of the response, not per listing
+        listings = self.root.instance
+        if isinstance(listings, Listing):
+            listings = [listings]
+        return with_derivatives(name for listing in listings for name in listing.image_urls)
+
+
+class ListingSerializer(SparseFieldsMixin, DerivativesMixin, serializers.ModelSerializer):
     image_urls = serializers.SerializerMethodField()
-    
+    image_srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = Listing
         fields = '__all__'
-        
+        read_only_fields = ('review_count', 'rating_sum', 'average_rating')
+
+    @classmethod
+    def load(cls, queryset, fields=None):
+        """Narrow ``queryset`` to the columns needed to output ``fields``."""
+        if fields is None:
+            return queryset
+        columns = {'image_urls' if name == 'image_srcset' else name for name in fields}
+        # The key and the feed ordering are always loaded for pagination cursors
+        return queryset.only('l_id', 'created_at', *columns)
+
+    @cached_property
+    def _media_base_url(self):
+        # With many=True one child serializer handles every row, so this is per response
+        return media_base_url(self.context.get('request'))
+
+    def _media_url(self, name):
+        return self._media_base_url + name
+
     def get_image_urls(self, obj):
         """Convert stored filenames to full URLs"""
-        request = self.context.get('request')
-        if obj.image_urls:
-            # Check if image_urls is already a list or still a string
-            if isinstance(obj.image_urls, list):
-                urls = obj.image_urls
+        return [self._media_url(name) for name in obj.image_urls]
+
+    def get_image_srcset(self, obj):
+        """Per image, the URL of its WebP derivative at each width"""
+        return [
+            image_srcset(self._media_base_url, name, name in self._with_derivatives)
+            for name in obj.image_urls
+        ]
+
+
+class ListingCardSerializer(SparseFieldsMixin, DerivativesMixin, serializers.ModelSerializer):
+    """The compact listing shown on result cards, with a single thumbnail URL."""
+    id = serializers.IntegerField(source='l_id', read_only=True)
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Listing
+        fields = ('id', 'title', 'price', 'location', 'rating', 'thumbnail')
+        read_only_fields = fields
+
+    @classmethod
+    def load(cls, queryset, fields=None):
+        """
+        Load only the card columns, with the cover image name taken from
+        ListingImage and whether its derivatives exist from StoredImage.
+        """
+        cover = ListingImage.objects.filter(listing=OuterRef('pk'), position=0).values('name')[:1]
+        return queryset.only('l_id', 'title', 'price', 'location', 'rating', 'created_at').annotate(
+            cover_image=Subquery(cover),
+            cover_has_derivatives=Exists(
+                StoredImage.objects.filter(name=OuterRef('cover_image'), has_derivatives=True)
+            ),
+        )
+
+    @cached_property
+    def _media_base_url(self):
+        return media_base_url(self.context.get('request'))
+
+    def get_thumbnail(self, obj):
+        """The cover image's card-width derivative, or the original until it exists."""
+        if hasattr(obj, 'cover_image'):
+            name, has_derivatives = obj.cover_image, obj.cover_has_derivatives
+        else:
+            name = obj.image_urls[0] if obj.image_urls else None
+            has_derivatives = name in self._with_derivatives
+        if not name:
+            return None
+        if not has_derivatives:
+            return self._media_base_url + name
+        return self._media_base_url + derivative_name(name, CARD_THUMBNAIL_WIDTH)
+
+
+class ListingRows:
+    """
+    Read-only fast path producing the same dicts as ListingSerializer.
+
+    Listings are read as ``.values()`` rows and converted with one pass per
+    row: most columns are copied as-is, only decimals and datetimes go through
+    their DRF field, and image URLs share a base URL computed once.
+    """
+    # Columns every row carries so cursor pagination can read its position
+    CURSOR_COLUMNS = ('l_id', 'created_at')
+
+    def __init__(self, request=None, fields=None):
+        serializer = ListingSerializer(fields=fields)
+        self.names = list(serializer.fields)
+        self.converters = {}
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.DateTimeField):
+                self.converters[name] = self._datetime_converter(field)
+            elif isinstance(field, serializers.DecimalField):
+                self.converters[name] = field.to_representation
+        self.base_url = media_base_url(request)
+        # Names whose derivatives exist, looked up per batch by serialize()
+        self.with_derivatives = set()
+
+    @staticmethod
+    def _datetime_converter(field):
+        # DateTimeField.to_representation looks the timezone up on every call;
+        # resolve it once for the common ISO 8601 case
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if not output_format or output_format.lower() != ISO_8601 or field_timezone is None:
+            return field.to_representation
+
+        def convert(value):
+            if timezone.is_naive(value):
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+
+    def values(self, queryset):
+        columns = {'image_urls' if name == 'image_srcset' else name for name in self.names}
+        return queryset.values(*self.CURSOR_COLUMNS, *(columns - set(self.CURSOR_COLUMNS)))
+
+    def to_representation(self, row):
+        base_url, converters = self.base_url, self.converters
+        data = {}
+        for name in self.names:
+            if name == 'image_urls':
+                data[name] = [base_url + image for image in row['image_urls']]
+            elif name == 'image_srcset':
+                data[name] = [
+                    image_srcset(base_url, image, image in self.with_derivatives)
+                    for image in row['image_urls']
+                ]
             else:
-                # Split by comma and filter out empty strings
-                urls = [url.strip() for url in obj.image_urls.split(',') if url.strip()]
-            
-            # Construct full URLs with media path
-            if request:
-                base_url = request.build_absolute_uri('/').rstrip('/')
-                return [f"{base_url}/uploads/{url}" for url in urls]
-            return [f"/uploads/{url}" for url in urls]
-        return []
\ No newline at end of file
+                value = row[name]
+                if value is not None and name in converters:
+                    value = converters[name](value)
+                data[name] = value
+        return data
+
+    def serialize(self, rows):
+        rows = list(rows)
+        if 'image_srcset' in self.names:
+            self.with_derivatives = with_derivatives(image for row in rows for image in row['image_urls'])
+        return [self.to_representation(row) for row in rows]
+
+
+LISTING_VIEWS = {
+    'full': ListingSerializer,
+    'card': ListingCardSerializer,
+}
+
+
+def listing_representation(params):
+    """
+    Return ``(serializer_class, fields)`` for ``?view=`` (``full`` or ``card``)
+    and ``?fields=`` (comma-separated output fields; None means all).
+    Raises ValueError for an unknown view or field.
+    """
+    view = params.get('view', 'full')
+    if view not in LISTING_VIEWS:
+        raise ValueError(f"'view' must be one of: {', '.join(LISTING_VIEWS)}")
+    serializer_class = LISTING_VIEWS[view]
+
+    # An empty or all-comma ``fields`` means every field
+    fields = [name.strip() for name in params.get('fields', '').split(',') if name.strip()] or None
+    if fields:
+        unknown = set(fields) - set(serializer_class().fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return serializer_class, fields
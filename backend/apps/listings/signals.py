@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from .models import Listing, as_list
+from . import geo, images, search
+from .cache import invalidate_listing, invalidate_owner_stats
+
+
+@receiver(pre_save, sender=Listing)
+def normalize_listing_lists(sender, instance, raw=False, **kwargs):
+    """Never store amenities or image_urls as comma-separated strings again."""
+    if not raw:
+        instance.normalize_lists()
+
+
+@receiver(pre_save, sender=Listing)
+def locate_listing(sender, instance, raw=False, **kwargs):
+    """Fill in coordinates from the gazetteer and keep the geohash current."""
+    if not raw:
+        instance.locate()
+
+
+@receiver(post_save, sender=Listing)
+def sync_listing_images(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Keep the ordered ListingImage rows in step with Listing.image_urls."""
+    if raw:
+        return
+    if update_fields is not None and 'image_urls' not in update_fields:
+        return
+    instance.sync_images()
+
+
+@receiver(post_save, sender=Listing)
+def sync_listing_amenities(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Keep ListingAmenity rows in step with Listing.amenities on every write path."""
+    if raw:
+        return
+    if update_fields is not None and 'amenities' not in update_fields:
+        return
+    instance.sync_amenities()
+
+
+@receiver(post_save, sender=Listing)
+def index_listing(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Refresh the listing's full-text search row when its text changes."""
+    if raw:
+        return
+    if update_fields is not None and not {'title', 'location', 'description'} & set(update_fields):
+        return
+    search.index_listings([instance])
+
+
+@receiver(post_save, sender=Listing)
+def index_listing_location(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Refresh the listing's spatial index row when its coordinates change."""
+    if raw:
+        return
+    if update_fields is not None and not {'location', 'latitude', 'longitude'} & set(update_fields):
+        return
+    geo.index_listings([instance])
+
+
+@receiver(post_delete, sender=Listing)
+def unindex_listing(sender, instance, **kwargs):
+    search.unindex_listings([instance.l_id])
+    geo.unindex_listings([instance.l_id])
+
+
+@receiver(post_delete, sender=Listing)
+def release_listing_images(sender, instance, **kwargs):
+    """
+    Drop the deleted listing's image references once the delete commits, on
+    every delete path (views, admin, owner cascades).
+    """
+    names = as_list(instance.image_urls)
+
+    def release():
+        for name in names:
+            images.release_image(name)
+    transaction.on_commit(release)
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def invalidate_listing_cache(sender, instance, raw=False, **kwargs):
+    """Drop cached responses that include this listing."""
+    if raw:
+        return
+    l_id = instance.l_id
+    invalidate_listing(l_id)
+    invalidate_owner_stats(instance.owner_id)
+    # Bump again after commit: a concurrent read between the write and the
+    # commit could otherwise re-cache the old row under the new version.
+    transaction.on_commit(lambda: invalidate_listing(l_id))
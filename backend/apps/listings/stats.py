@@ -0,0 +1,68 @@
+"""
+Owner dashboard statistics.
+
+Totals come from one conditional-aggregation query over the owner's rows,
+which the ``(owner, status)`` index serves. The daily series only read rows
+inside the requested window: listings by ``owner`` and ``created_at``, likes
+from wishlist entries saved in the window on the owner's listings.
+"""
+from datetime import datetime, time, timedelta
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.wishlist.models import Wishlist
+from .cache import cached_owner_stats
+from .models import Listing
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 365
+
+
+def owner_totals(owner):
+    statuses = [choice for choice, _ in Listing.STATUS_CHOICES]
+    totals = Listing.objects.filter(owner=owner).aggregate(
+        total_listings=Count('l_id'),
+        **{f'{status}_listings': Count('l_id', filter=Q(status=status)) for status in statuses},
+        total_likes=Sum('likes'),
+        average_rating=Avg('rating'),
+    )
+    totals['total_likes'] = totals['total_likes'] or 0
+    totals['average_rating'] = totals['average_rating'] or 0
+    return totals
+
+
+def owner_daily_series(owner, days=DEFAULT_DAYS):
+    """Listings created and likes received per day for the last ``days`` days, oldest first."""
+    today = timezone.localdate()
+    first_day = today - timedelta(days=days - 1)
+    since = timezone.make_aware(datetime.combine(first_day, time.min))
+
+    created = dict(
+        Listing.objects.filter(owner=owner, created_at__gte=since)
+        .annotate(day=TruncDate('created_at')).order_by()
+        .values('day').annotate(n=Count('l_id')).values_list('day', 'n')
+    )
+    likes = dict(
+        Wishlist.objects.filter(listing__owner=owner, created_at__gte=since)
+        .annotate(day=TruncDate('created_at')).order_by()
+        .values('day').annotate(n=Count('id')).values_list('day', 'n')
+    )
+
+    series = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        series.append({
+            'date': day.isoformat(),
+            'listings_created': created.get(day, 0),
+            'likes': likes.get(day, 0),
+        })
+    return series
+
+
+def owner_listing_stats(owner, days=DEFAULT_DAYS):
+    """Totals plus a ``daily`` series for ``owner``, served from the cache when unchanged."""
+    def compute():
+        stats = owner_totals(owner)
+        stats['daily'] = owner_daily_series(owner, days)
+        return stats
+    return cached_owner_stats(owner.pk, days, compute)
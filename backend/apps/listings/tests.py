@@ -0,0 +1,879 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from . import geo, images, importing, search
+from apps.reviews.models import Review
+from apps.users.models import UserProfile
+from .filters import _prefix_bounds, filter_listings
+from .models import Listing, ListingAmenity, ListingImage, StoredImage
+from .renderers import ListingJSONRenderer
+from .serializers import ListingRows, ListingSerializer
+
+
+def create_user(uid='owner_1', username='owner', role='owner'):
+    return UserProfile.objects.create(uid=uid, username=username, email=f'{username}@example.com', role=role)
+
+
+class ListingFeedTestCase(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+        for i in range(5):
+            Listing.objects.create(
+                title=f'Listing {i}', location='Kasarani, Nairobi', price=10000 + i,
+                rating=4, description='', owner=self.owner,
+            )
+        Listing.objects.create(
+            title='Archived', location='Kasarani, Nairobi', price=9000,
+            rating=3, description='', owner=self.owner, status='archived',
+        )
+
+    def test_unpaginated_feed_returns_every_listing(self):
+        response = self.client.get('/api/listings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 6)
+
+    def test_cursor_feed_walks_active_listings(self):
+        response = self.client.get('/api/listings/?page_size=2')
+        body = response.json()
+        self.assertEqual(len(body['results']), 2)
+        seen = [listing['l_id'] for listing in body['results']]
+
+        while body['next']:
+            body = self.client.get(body['next']).json()
+            seen += [listing['l_id'] for listing in body['results']]
+
+        active = Listing.objects.filter(status='active').order_by('-created_at', '-l_id')
+        self.assertEqual(seen, [listing.l_id for listing in active])
+
+
+
+class ListingFilterTestCase(TestCase):
+    def setUp(self):
+        owner = create_user()
+        self.gym = Listing.objects.create(
+            title='Gym', location='Kasarani, Nairobi', price=12000, rating=4,
+            description='', amenities=['Gym', 'parking space'], owner=owner,
+        )
+        self.patio = Listing.objects.create(
+            title='Patio', location='Westlands, Nairobi', price=30000, rating=5,
+            description='', amenities='patio, gym', owner=owner,
+        )
+
+    def get_ids(self, query):
+        response = self.client.get(f'/api/listings/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return sorted(listing['l_id'] for listing in response.json())
+
+    def test_filters(self):
+        self.assertEqual(self.get_ids('location=kasarani'), [self.gym.l_id])
+        self.assertEqual(self.get_ids('location=WestLands,%20N'), [self.patio.l_id])
+        self.assertEqual(self.get_ids('location=kasaranix'), [])
+        self.assertEqual(self.get_ids('min_price=20000'), [self.patio.l_id])
+        self.assertEqual(self.get_ids('max_price=20000&min_rating=4'), [self.gym.l_id])
+        self.assertEqual(self.get_ids('amenities=gym'), sorted([self.gym.l_id, self.patio.l_id]))
+        self.assertEqual(self.get_ids('amenities=gym,patio'), [self.patio.l_id])
+
+    def test_non_ascii_locations(self):
+        nyeri = Listing.objects.create(
+            title='Ñyeri', location='Ñyeri Town', price=8000, rating=4, description='', owner=self.gym.owner,
+        )
+        self.assertEqual(self.get_ids('location=%C3%91yeri'), [nyeri.l_id])
+        self.assertEqual(self.get_ids('location=%F4%8F%BF%BF'), [])
+        self.assertEqual(self.get_ids('location=kasarani%F4%8F%BF%BF'), [])
+        self.assertEqual(self.client.get('/api/listings/?location=a%00').status_code, 400)
+
+        self.assertEqual(_prefix_bounds('a\U0010ffff'), ('a\U0010ffff', 'b'))
+        self.assertEqual(_prefix_bounds('\U0010ffff'), ('\U0010ffff', None))
+
+    def test_location_and_amenity_filters_use_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("EXPLAIN QUERY PLAN output is SQLite-specific")
+        plan = filter_listings(Listing.objects.all(), QueryDict('location=kas&amenities=gym')).explain()
+        self.assertNotIn('SCAN listings_listing', plan)
+        self.assertIn('listings_location_lower_idx', filter_listings(
+            Listing.objects.all(), QueryDict('location=kas')
+        ).explain())
+
+    def test_amenity_index_follows_updates(self):
+        self.gym.amenities = ['patio']
+        self.gym.save()
+        self.assertEqual(self.get_ids('amenity=gym'), [self.patio.l_id])
+
+    def test_invalid_number_is_rejected(self):
+        for query in ['min_price=cheap', 'min_price=NaN', 'max_price=Infinity', 'min_rating=inf', 'min_price=sNaN']:
+            response = self.client.get(f'/api/listings/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+class ListingSearchTestCase(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+        self.ridge = Listing.objects.create(
+            title='Ridge Apartments', location='Kasarani, Nairobi', price=18000, rating=5,
+            description='Luxurious modern 3 bedroom house', owner=self.owner,
+        )
+        self.studio = Listing.objects.create(
+            title='Studio', location='Westlands, Nairobi', price=15000, rating=4,
+            description='Close to Ridge road', owner=self.owner,
+        )
+
+    def search(self, query, **params):
+        response = self.client.get('/api/listings/search', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [listing['l_id'] for listing in response.json()['results']]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('ridge'), [self.ridge.l_id, self.studio.l_id])
+        self.assertEqual(self.search('westl'), [self.studio.l_id])
+
+    def test_index_follows_writes(self):
+        self.studio.title = 'Garden Cottage'
+        self.studio.save()
+        self.assertEqual(self.search('garden'), [self.studio.l_id])
+
+        self.ridge.delete()
+        self.assertEqual(self.search('ridge'), [self.studio.l_id])
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(self.search('ridge', limit=-3), [self.ridge.l_id])
+        self.assertEqual(self.search('ridge', limit=0), [self.ridge.l_id])
+
+
+class ListingCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = create_user()
+        self.listing = Listing.objects.create(
+            title='Ridge Apartments', location='Kasarani, Nairobi', price=18000, rating=5,
+            description='', owner=owner,
+        )
+
+    def test_if_none_match_returns_304(self):
+        response = self.client.get(f'/api/listings/{self.listing.l_id}/')
+        etag = response['ETag']
+        response = self.client.get(f'/api/listings/{self.listing.l_id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_invalidate_cached_responses(self):
+        list_etag = self.client.get('/api/listings/')['ETag']
+        detail_etag = self.client.get(f'/api/listings/{self.listing.l_id}/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.title = 'Ridge Residences'
+            self.listing.save()
+
+        response = self.client.get('/api/listings/', HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['title'], 'Ridge Residences')
+        response = self.client.get(f'/api/listings/{self.listing.l_id}/', HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.json()['title'], 'Ridge Residences')
+
+
+class ListingImageTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, name='front.jpg', size=(2000, 1000)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'teal').save(buffer, 'JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_derivatives_are_webp_at_each_width(self):
+        name, created = images.save_upload(self.upload())
+        self.assertTrue(created)
+        self.assertRegex(name, images.HASHED_NAME_RE)
+
+        self.assertFalse(StoredImage.objects.get(name=name).has_derivatives)
+        images.generate_derivatives(name)
+        self.assertTrue(StoredImage.objects.get(name=name).has_derivatives)
+        for width in images.DERIVATIVE_WIDTHS:
+            with default_storage.open(images.derivative_name(name, width)) as f:
+                derivative = Image.open(f)
+                self.assertEqual((derivative.format, derivative.width), ('WEBP', width))
+
+        images.delete_image(name)
+        self.assertEqual(default_storage.listdir('derivatives')[1], [])
+        self.assertFalse(default_storage.exists(name))
+
+    def test_extension_comes_from_the_image_bytes(self):
+        buffer = BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, 'PNG')
+        name, _ = images.save_upload(SimpleUploadedFile('photo.html', buffer.getvalue()))
+        self.assertTrue(name.endswith('.png'))
+
+        script = SimpleUploadedFile('x.svg', b'<svg onload="alert(1)"/>', content_type='image/svg+xml')
+        with self.assertRaises(images.UnsupportedImage):
+            images.save_uploads([self.upload(), script])
+        self.assertEqual(StoredImage.objects.exclude(name=name).count(), 0)
+
+        response = self.client.post('/api/listings/create/', {
+            'title': 'Bad', 'location': 'Kasarani', 'price': '1', 'rating': '1', 'images': script,
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_identical_uploads_are_stored_once_and_reference_counted(self):
+        first, created = images.save_upload(self.upload('a.jpg'))
+        second, created_again = images.save_upload(self.upload('copy of a.JPG'))
+        self.assertEqual(first, second)
+        self.assertFalse(created_again)
+        self.assertEqual(default_storage.listdir('')[1], [first])
+        self.assertEqual(StoredImage.objects.get(name=first).ref_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            images.release_image(first)
+        self.assertTrue(default_storage.exists(first))
+        with self.captureOnCommitCallbacks(execute=True):
+            images.release_image(first)
+        self.assertFalse(default_storage.exists(first))
+        self.assertFalse(StoredImage.objects.filter(name=first).exists())
+
+
+    def test_deleting_a_listing_releases_its_images(self):
+        owner = create_user()
+        own, _ = images.save_upload(self.upload('own.jpg', (10, 10)))
+        shared, _ = images.save_upload(self.upload('shared.jpg'))
+        images.retain_images([shared])
+        listing = Listing.objects.create(
+            title='Gone', location='Kasarani', price=1, rating=1, owner=owner, image_urls=[own, shared],
+        )
+        client = APIClient()
+        client.force_authenticate(owner)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.delete(f'/api/owner/listings/{listing.l_id}/delete/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(StoredImage.objects.filter(name=own).exists())
+        self.assertFalse(default_storage.exists(own))
+        self.assertEqual(StoredImage.objects.get(name=shared).ref_count, 1)
+        self.assertTrue(default_storage.exists(shared))
+
+class MediaServingTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, DEBUG=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.name = '0' * 64 + '.jpg'
+        default_storage.save(self.name, BytesIO(b'0123456789'))
+
+    def test_hashed_names_are_immutable_and_revalidate(self):
+        response = self.client.get(f'/uploads/{self.name}')
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get(f'/uploads/{self.name}', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_byte_ranges(self):
+        response = self.client.get(f'/uploads/{self.name}', HTTP_RANGE='bytes=2-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+
+        response = self.client.get(f'/uploads/{self.name}', HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        response = self.client.get(f'/uploads/{self.name}', HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_only_raster_images_are_served_inline(self):
+        response = self.client.get(f'/uploads/{self.name}')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        self.assertTrue(response['Content-Disposition'].startswith('inline'))
+
+        for name in ['page.html', 'drawing.svg']:
+            default_storage.save(name, BytesIO(b'<script>alert(1)</script>'))
+            response = self.client.get(f'/uploads/{name}')
+            self.assertEqual(response['Content-Disposition'], 'attachment')
+            self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+    def test_paths_outside_media_root_are_not_served(self):
+        self.assertEqual(self.client.get('/uploads/../settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/uploads/missing.jpg').status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_accel_redirect_handoff(self):
+        response = self.client.get(f'/api/uploads/{self.name}')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+
+
+class ListingImportTestCase(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_imports_repo_csv_format(self):
+        path = self.write('listings.csv', (
+            'l_id,title,location,description,price,amenities,rating,imageUrls,__v\n'
+            '1,Micasa Apartments1,"Kasarani, Nairobi",Spacious,Ksh 12000 ,'
+            '"[\'2 baths\', \'Gym\', \'gym\', \'parking  space\']",4,"[\'Apartment1.jpg\', \'Apartment5.jpg\']",0\n'
+            '2,Ridge Apartments,"Kasarani, Nairobi",Modern,"Ksh 18,000","[\'patio\']",5,[],0\n'
+            '3,,Nowhere,,Ksh 1,[],1,[],0\n'
+        ))
+        call_command('import_listings', path, owner='owner_1', stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(Listing.objects.count(), 2)
+        listing = Listing.objects.get(l_id=1)
+        self.assertEqual(listing.price, 12000)
+        self.assertEqual(listing.amenities, ['2 baths', 'Gym', 'parking space'])
+        self.assertEqual(listing.image_urls, ['Apartment1.jpg', 'Apartment5.jpg'])
+        self.assertEqual(Listing.objects.get(l_id=2).price, 18000)
+        self.assertEqual(
+            set(ListingAmenity.objects.filter(listing=listing).values_list('amenity__name', flat=True)),
+            {'2 baths', 'gym', 'parking space'},
+        )
+        self.assertEqual(search.search_listing_ids('ridge'), [2])
+
+    def test_reimport_updates_in_place(self):
+        path = self.write('listings.ndjson', (
+            '{"l_id": 7, "title": "Old", "location": "Kasarani", "price": 100, "rating": 3, "amenities": ["gym"]}\n'
+        ))
+        call_command('import_listings', path, owner='owner@example.com', stdout=StringIO())
+        Listing.objects.filter(l_id=7).update(likes=4)
+
+        path = self.write('listings.json', json.dumps([
+            {"l_id": 7, "title": "New", "location": "Kasarani", "price": "Ksh 200", "rating": 4, "amenities": ["patio"]},
+            {"title": "Fresh", "location": "Westlands", "price": 300, "rating": 5},
+        ]))
+        call_command('import_listings', path, owner='owner', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(Listing.objects.count(), 2)
+        listing = Listing.objects.get(l_id=7)
+        self.assertEqual((listing.title, listing.price, listing.likes), ('New', 200, 4))
+        self.assertEqual(list(listing.listing_amenities.values_list('amenity__name', flat=True)), ['patio'])
+
+    def test_imported_images_are_reference_counted(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        for name in ['uploaded.jpg', 'shared.jpg', 'old.jpg']:
+            default_storage.save(name, BytesIO(b'x'))
+        StoredImage.objects.create(name='uploaded.jpg', ref_count=1)
+
+        path = self.write('listings.ndjson', (
+            '{"l_id": 1, "title": "One", "price": 1, "image_urls": ["uploaded.jpg", "shared.jpg", "old.jpg"]}\n'
+            '{"l_id": 2, "title": "Two", "price": 1, "image_urls": ["shared.jpg"]}\n'
+        ))
+        call_command('import_listings', path, owner='owner', stdout=StringIO())
+        refs = dict(StoredImage.objects.values_list('name', 'ref_count'))
+        self.assertEqual(refs, {'uploaded.jpg': 2, 'shared.jpg': 2, 'old.jpg': 1})
+
+        # Deleting one listing keeps files the other listings still use
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete('/api/listings/2/delete/')
+        self.assertTrue(default_storage.exists('shared.jpg'))
+
+        path = self.write('update.ndjson', '{"l_id": 1, "title": "One", "price": 1, "image_urls": ["uploaded.jpg"]}\n')
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_listings', path, owner='owner', stdout=StringIO())
+        self.assertEqual(dict(StoredImage.objects.values_list('name', 'ref_count')), {'uploaded.jpg': 2})
+        self.assertFalse(default_storage.exists('old.jpg'))
+        self.assertFalse(default_storage.exists('shared.jpg'))
+        self.assertTrue(default_storage.exists('uploaded.jpg'))
+
+    def test_negative_prices_are_rejected(self):
+        for value in ['-500', 'Ksh -500', -500, 'NaN']:
+            with self.assertRaises(ValueError):
+                importing.parse_price(value)
+        self.assertEqual(importing.parse_price('Ksh 1,500.50'), Decimal('1500.50'))
+
+    def test_upserts_invalidate_the_existing_owners_stats(self):
+        other = create_user('owner_2', 'other', 'owner')
+        Listing.objects.create(l_id=5, title='Theirs', location='Kasarani', price=1, rating=1, description='', owner=other)
+        path = self.write('listings.ndjson', (
+            '{"l_id": 5, "title": "Updated", "price": 2}\n'
+            '{"l_id": 6, "title": "Mine", "price": 3}\n'
+        ))
+        with mock.patch('apps.listings.management.commands.import_listings.invalidate_owner_stats') as invalidate:
+            call_command('import_listings', path, owner='owner', stdout=StringIO())
+        self.assertEqual({call.args[0] for call in invalidate.call_args_list}, {self.owner.pk, other.pk})
+        self.assertEqual(Listing.objects.get(l_id=5).owner, other)
+
+    def test_json_array_is_decoded_incrementally(self):
+        records = [{"title": f"Listing {i}", "tags": ["a, b]", "{c}"]} for i in range(50)]
+        f = StringIO(json.dumps(records, indent=2))
+        self.assertEqual(list(importing.iter_json_array(f, read_size=7)), records)
+
+        with self.assertRaises(importing.ImportFormatError):
+            list(importing.iter_json_array(StringIO('[{"title": "x"}, {"tit'), read_size=7))
+
+
+class ExportDataTestCase(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+        self.listings = [
+            Listing.objects.create(
+                title=f'Listing {i}', location='Kasarani, Nairobi', price=10000 + i,
+                rating=4, description='', amenities=['gym'], owner=self.owner,
+            )
+            for i in range(3)
+        ]
+        Review.objects.create(listing=self.listings[0], user='a@example.com', rating=5, comment='Great')
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def export(self, *args, **options):
+        call_command('export_data', *args, output_dir=self.tmpdir, stdout=StringIO(), **options)
+
+    def test_ndjson_gzip_export(self):
+        self.export('listings', 'reviews', gzip=True)
+
+        with gzip.open(os.path.join(self.tmpdir, 'listings.ndjson.gz'), 'rt') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['l_id'] for row in rows], sorted(l.l_id for l in self.listings))
+        self.assertEqual(rows[0]['owner_uid'], 'owner_1')
+        self.assertEqual(rows[0]['amenities'], ['gym'])
+
+        with gzip.open(os.path.join(self.tmpdir, 'reviews.ndjson.gz'), 'rt') as f:
+            reviews = [json.loads(line) for line in f]
+        self.assertEqual(reviews[0]['l_id'], self.listings[0].l_id)
+
+    def test_csv_export_writes_header_for_empty_datasets(self):
+        self.export('wishlist', format='csv')
+        with open(os.path.join(self.tmpdir, 'wishlist.csv')) as f:
+            self.assertEqual(f.read().strip(), 'id,created_at,user_uid,l_id')
+
+    def test_watermark_file_exports_only_changes(self):
+        watermark_file = os.path.join(self.tmpdir, 'watermarks.json')
+        path = os.path.join(self.tmpdir, 'listings.ndjson')
+
+        self.export('listings', watermark_file=watermark_file)
+        with open(path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+        self.export('listings', watermark_file=watermark_file)
+        with open(path) as f:
+            self.assertEqual(f.read(), '')
+
+        self.listings[1].title = 'Renamed'
+        self.listings[1].save()
+        self.export('listings', watermark_file=watermark_file)
+        with open(path) as f:
+            self.assertEqual([json.loads(line)['title'] for line in f], ['Renamed'])
+
+        Listing.record_like(self.listings[0].l_id)
+        Listing.record_review(self.listings[2].l_id, 5)
+        self.export('listings', watermark_file=watermark_file)
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(
+            sorted((row['l_id'], row['likes'], row['review_count']) for row in rows),
+            [(self.listings[0].l_id, 1, 0), (self.listings[2].l_id, 0, 1)],
+        )
+
+
+class ListingLikesTestCase(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+        self.hunter = create_user('hunter_1', 'hunter', 'hunter')
+        self.listing = Listing.objects.create(
+            title='Listing', location='Kasarani, Nairobi', price=10000,
+            rating=4, description='', owner=self.owner,
+        )
+
+    def test_toggle_moves_likes_atomically(self):
+        self.assertTrue(self.hunter.toggle_wishlist(self.listing))
+        self.assertTrue(self.owner.toggle_wishlist(self.listing))
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.likes, 2)
+
+        self.assertFalse(self.hunter.toggle_wishlist(self.listing))
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.likes, 1)
+        self.assertEqual(list(self.owner.wishlist.all()), [self.listing])
+
+    def test_likes_never_go_negative(self):
+        Listing.record_like(self.listing.l_id, -1)
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.likes, 0)
+
+    def test_reconcile_likes_recounts_from_wishlists(self):
+        self.hunter.wishlist.add(self.listing)
+        Listing.objects.filter(l_id=self.listing.l_id).update(likes=40)
+        other = Listing.objects.create(
+            title='Other', location='Westlands, Nairobi', price=20000,
+            rating=4, description='', owner=self.owner,
+        )
+
+        out = StringIO()
+        call_command('reconcile_likes', stdout=out)
+        self.assertIn('for 1 listings', out.getvalue())
+        self.listing.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.listing.likes, other.likes), (1, 0))
+
+
+class OwnerStatsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user()
+        self.hunter = create_user('hunter_1', 'hunter', 'hunter')
+        for i, status in enumerate(['active', 'active', 'pending', 'archived']):
+            Listing.objects.create(
+                title=f'Listing {i}', location='Kasarani, Nairobi', price=10000,
+                rating=2 + i, description='', owner=self.owner, status=status,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_stats_come_from_three_queries_then_the_cache(self):
+        self.hunter.toggle_wishlist(Listing.objects.first())
+
+        with self.assertNumQueries(3):
+            stats = self.client.get('/api/owner/listings/stats/?days=7').json()
+        self.assertEqual(stats['total_listings'], 4)
+        self.assertEqual(stats['active_listings'], 2)
+        self.assertEqual(stats['pending_listings'], 1)
+        self.assertEqual(stats['inactive_listings'], 0)
+        self.assertEqual(stats['total_likes'], 1)
+        self.assertEqual(stats['average_rating'], 3.5)
+        self.assertEqual(len(stats['daily']), 7)
+        self.assertEqual(stats['daily'][-1]['listings_created'], 4)
+        self.assertEqual(stats['daily'][-1]['likes'], 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/owner/listings/stats/?days=7').json(), stats)
+
+    def test_writes_and_likes_invalidate_stats(self):
+        self.assertEqual(self.client.get('/api/owner/listings/stats/').json()['total_likes'], 0)
+
+        self.hunter.toggle_wishlist(Listing.objects.first())
+        self.assertEqual(self.client.get('/api/owner/listings/stats/').json()['total_likes'], 1)
+
+        Listing.objects.filter(status='archived').first().delete()
+        self.assertEqual(self.client.get('/api/owner/listings/stats/').json()['total_listings'], 3)
+
+    def test_rejects_bad_windows(self):
+        self.assertEqual(self.client.get('/api/owner/listings/stats/?days=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/owner/listings/stats/?days=x').status_code, 400)
+
+
+class OwnerListingsTestCase(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+        other = create_user('owner_2', 'other', 'owner')
+        for i in range(25):
+            Listing.objects.create(
+                title=f'Listing {i}', location='Kasarani, Nairobi', price=10000 + i,
+                rating=4, description='', owner=self.owner,
+            )
+        Listing.objects.create(
+            title='Not mine', location='Westlands, Nairobi', price=5000,
+            rating=4, description='', owner=other,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_unpaginated_listing_is_one_query(self):
+        with self.assertNumQueries(1):
+            body = self.client.get('/api/owner/listings/').json()
+        self.assertEqual(body['count'], 25)
+        self.assertEqual(len(body['listings']), 25)
+
+    def test_cursor_pages_have_constant_query_counts(self):
+        with self.assertNumQueries(2):
+            body = self.client.get('/api/owner/listings/?page_size=10').json()
+        self.assertEqual(body['count'], 25)
+        seen = [listing['l_id'] for listing in body['listings']]
+
+        while body['next']:
+            with self.assertNumQueries(1):
+                body = self.client.get(body['next']).json()
+            self.assertNotIn('count', body)
+            seen += [listing['l_id'] for listing in body['listings']]
+
+        mine = Listing.objects.filter(owner=self.owner).order_by('-created_at', '-l_id')
+        self.assertEqual(seen, [listing.l_id for listing in mine])
+
+    def test_str_does_not_load_the_owner(self):
+        listings = list(Listing.objects.all())
+        with self.assertNumQueries(0):
+            labels = [str(listing) for listing in listings]
+        self.assertIn(f'Listing 0 (#{listings[-1].l_id})', labels)
+
+
+class ListingListFieldsTestCase(TestCase):
+    def setUp(self):
+        self.owner = create_user()
+
+    def test_strings_are_stored_as_lists_with_ordered_images(self):
+        listing = Listing.objects.create(
+            title='Legacy', location='Kasarani, Nairobi', price=10000, rating=4, description='',
+            amenities='gym, patio ,', image_urls='b.jpg, a.jpg', owner=self.owner,
+        )
+        listing.refresh_from_db()
+        self.assertEqual(listing.amenities, ['gym', 'patio'])
+        self.assertEqual(listing.image_urls, ['b.jpg', 'a.jpg'])
+        self.assertEqual(list(listing.images.values_list('name', 'position')), [('b.jpg', 0), ('a.jpg', 1)])
+
+        listing.image_urls = ['a.jpg']
+        listing.save(update_fields=['image_urls'])
+        self.assertEqual(list(listing.images.values_list('name', flat=True)), ['a.jpg'])
+
+    def test_import_fills_listing_images(self):
+        path = os.path.join(tempfile.mkdtemp(), 'listings.ndjson')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write('{"l_id": 3, "title": "T", "price": 1, "rating": 1, "imageUrls": ["x.jpg", "y.jpg"]}\n')
+        call_command('import_listings', path, owner='owner_1', stdout=StringIO())
+        self.assertEqual(
+            list(ListingImage.objects.filter(listing_id=3).values_list('name', flat=True)), ['x.jpg', 'y.jpg']
+        )
+
+
+class ListingFacetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = create_user()
+        for location, amenities, listing_status in [
+            ('Kasarani, Nairobi', ['Gym', 'parking space'], 'active'),
+            ('Kasarani, Nairobi', ['gym'], 'active'),
+            ('Westlands, Nairobi', ['parking space', 'patio'], 'active'),
+            ('Westlands, Nairobi', ['gym'], 'archived'),
+        ]:
+            Listing.objects.create(
+                title='Listing', location=location, price=10000, rating=4, description='',
+                amenities=amenities, owner=owner, status=listing_status,
+            )
+
+    def test_counts_active_listings(self):
+        body = self.client.get('/api/listings/facets/').json()
+        self.assertEqual(body['total'], 3)
+        self.assertEqual(body['amenities'], [
+            {'name': 'gym', 'count': 2}, {'name': 'parking space', 'count': 2}, {'name': 'patio', 'count': 1},
+        ])
+        self.assertEqual(body['locations'], [
+            {'location': 'Kasarani, Nairobi', 'count': 2}, {'location': 'Westlands, Nairobi', 'count': 1},
+        ])
+
+    def test_facets_follow_listing_filters_and_writes(self):
+        body = self.client.get('/api/listings/facets/?amenities=gym').json()
+        self.assertEqual(body['total'], 2)
+        self.assertEqual(body['locations'], [{'location': 'Kasarani, Nairobi', 'count': 2}])
+
+        Listing.objects.filter(status='archived').update(status='active')
+        cached = self.client.get('/api/listings/facets/?amenities=gym').json()
+        self.assertEqual(cached['total'], 2)
+
+        Listing.objects.get(location='Westlands, Nairobi', amenities=['gym']).save()
+        self.assertEqual(self.client.get('/api/listings/facets/?amenities=gym').json()['total'], 3)
+
+    def test_invalid_filters_are_rejected(self):
+        self.assertEqual(self.client.get('/api/listings/facets/?min_price=x').status_code, 400)
+        self.assertEqual(self.client.get('/api/listings/facets/?facet_limit=x').status_code, 400)
+        self.assertEqual(len(self.client.get('/api/listings/facets/?facet_limit=-1').json()['locations']), 1)
+
+
+class ListingGeoTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = create_user()
+        self.listings = {
+            location: Listing.objects.create(
+                title=location, location=location, price=10000, rating=4, description='', owner=owner,
+            )
+            for location in [
+                'Kasarani, Nairobi', 'Seasons Kasarani Mwiki RD, Nairobi', 'Westlands, Nairobi',
+                'Milimani, Nakuru', 'Somewhere else',
+            ]
+        }
+
+    def test_locations_are_geocoded_offline(self):
+        self.assertEqual(geo.geocode('Milimani, Nakuru'), (-0.2870, 36.0620))
+        self.assertEqual(geo.geocode('Milimani, Nairobi'), (-1.2930, 36.8000))
+        self.assertEqual(geo.geocode('Nakuru'), (-0.3031, 36.0800))
+        self.assertIsNone(geo.geocode('Somewhere else'))
+
+        listing = self.listings['Kasarani, Nairobi']
+        self.assertEqual((listing.latitude, listing.longitude), (-1.2215, 36.8986))
+        self.assertEqual(listing.geohash, geo.encode_geohash(-1.2215, 36.8986))
+
+        listing = Listing.objects.get(pk=listing.pk)
+        listing.location = 'Westlands, Nairobi'
+        listing.save()
+        self.assertEqual((listing.latitude, listing.longitude), (-1.2676, 36.8108))
+
+    def test_nearby_is_sorted_by_distance_and_paginated(self):
+        body = self.client.get('/api/listings/nearby/?lat=-1.2215&lng=36.8986&radius_km=5&limit=1').json()
+        self.assertEqual(body['count'], 2)
+        self.assertEqual(body['results'][0]['location'], 'Kasarani, Nairobi')
+        self.assertEqual(body['results'][0]['distance_km'], 0)
+
+        body = self.client.get(body['next']).json()
+        self.assertEqual([row['location'] for row in body['results']], ['Seasons Kasarani Mwiki RD, Nairobi'])
+        self.assertIsNone(body['next'])
+
+        body = self.client.get('/api/listings/nearby/?lat=-1.2215&lng=36.8986&radius_km=50').json()
+        self.assertEqual(body['count'], 3)
+
+    def test_distance_page_is_serialized_once(self):
+        Listing.objects.update(image_urls=['front.jpg', 'back.jpg'])
+        cache.clear()
+        url = '/api/listings/nearby/?lat=-1.2215&lng=36.8986&radius_km=50'
+        # Candidates, the page rows, and one derivative lookup for the whole page
+        with self.assertNumQueries(3):
+            body = self.client.get(url).json()
+        self.assertEqual([row['distance_km'] for row in body['results']], sorted(
+            row['distance_km'] for row in body['results']
+        ))
+        self.assertEqual(body['results'][0]['location'], 'Kasarani, Nairobi')
+
+    def test_bbox_covers_the_viewport(self):
+        body = self.client.get('/api/listings/within/?bbox=36.7,-1.35,36.95,-1.15&lat=-1.2676&lng=36.8108').json()
+        self.assertEqual(
+            [row['location'] for row in body['results']],
+            ['Westlands, Nairobi', 'Kasarani, Nairobi', 'Seasons Kasarani Mwiki RD, Nairobi'],
+        )
+        self.assertEqual(self.client.get('/api/listings/within/?bbox=1,2').status_code, 400)
+        self.assertEqual(self.client.get('/api/listings/within/?bbox=-180,-90,180,90').status_code, 400)
+        self.assertEqual(self.client.get('/api/listings/nearby/?lat=100&lng=1').status_code, 400)
+        for radius in ['nan', '-1', '0', 'inf']:
+            response = self.client.get(f'/api/listings/nearby/?lat=-1.2215&lng=36.8986&radius_km={radius}')
+            self.assertEqual(response.status_code, 400, radius)
+
+        body = self.client.get('/api/listings/nearby/?lat=-1.2215&lng=36.8986&limit=-1').json()
+        self.assertEqual(len(body['results']), 1)
+        self.assertIn('offset=1', body['next'])
+
+    def test_geohash_cover_matches_rtree(self):
+        box = (-1.35, 36.7, -1.15, 36.95)
+        prefixes = geo.covering_geohashes(*box)
+        self.assertLessEqual(len(prefixes), geo.MAX_COVER_CELLS)
+        for listing in Listing.objects.filter(geo.bbox_filter(*box)):
+            self.assertTrue(any(listing.geohash.startswith(prefix) for prefix in prefixes))
+
+
+class ListingRepresentationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = create_user()
+        self.listing = Listing.objects.create(
+            title='Card', location='Kasarani, Nairobi', price=10000, rating=4,
+            description='A very long description', owner=owner, image_urls=['cover.jpg', 'kitchen.jpg'],
+        )
+        Listing.objects.create(
+            title='No images', location='Westlands, Nairobi', price=20000, rating=3, description='', owner=owner,
+        )
+
+    def test_card_view_loads_only_card_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            body = self.client.get('/api/listings/?view=card&page_size=10').json()
+        self.assertNotIn('description', ' '.join(query['sql'] for query in queries))
+
+        cards = {card['id']: card for card in body['results']}
+        card = cards[self.listing.l_id]
+        self.assertEqual(set(card), {'id', 'title', 'price', 'location', 'rating', 'thumbnail'})
+        self.assertEqual(card['thumbnail'], 'http://testserver/uploads/cover.jpg')
+        self.assertEqual(len(cards), 2)
+        self.assertIsNone([c for c in cards.values() if c['title'] == 'No images'][0]['thumbnail'])
+
+    def test_derivatives_are_linked_once_they_exist(self):
+        url = f'/api/listings/{self.listing.l_id}/'
+        body = self.client.get(url).json()
+        self.assertEqual(body['image_srcset'][0], dict.fromkeys(['320', '640', '1280'], body['image_urls'][0]))
+
+        StoredImage.objects.create(name='cover.jpg', has_derivatives=True)
+        cache.clear()
+        body = self.client.get(url).json()
+        self.assertEqual(body['image_srcset'][0]['320'], 'http://testserver/uploads/derivatives/cover-320w.webp')
+        self.assertEqual(body['image_srcset'][1]['320'], 'http://testserver/uploads/kitchen.jpg')
+        card = self.client.get(url + '?view=card').json()
+        self.assertEqual(card['thumbnail'], 'http://testserver/uploads/derivatives/cover-320w.webp')
+        cards = self.client.get('/api/listings/?view=card').json()
+        self.assertIn('http://testserver/uploads/derivatives/cover-320w.webp', [c['thumbnail'] for c in cards])
+
+    def test_sparse_fieldsets(self):
+        with CaptureQueriesContext(connection) as queries:
+            body = self.client.get('/api/listings/?fields=l_id,title,image_srcset').json()
+        self.assertNotIn('description', ' '.join(query['sql'] for query in queries))
+        self.assertEqual(set(body[0]), {'l_id', 'title', 'image_srcset'})
+
+        body = self.client.get('/api/listings/?fields=,,').json()
+        self.assertIn('description', body[0])
+
+        body = self.client.get(f'/api/listings/{self.listing.l_id}/?view=card&fields=id,title').json()
+        self.assertEqual(body, {'id': self.listing.l_id, 'title': 'Card'})
+
+        body = self.client.get('/api/listings/nearby/?lat=-1.2215&lng=36.8986&view=card').json()
+        self.assertEqual(body['results'][0]['id'], self.listing.l_id)
+        self.assertIn('distance_km', body['results'][0])
+
+    def test_unknown_view_or_field_is_rejected(self):
+        self.assertEqual(self.client.get('/api/listings/?fields=title,secret').status_code, 400)
+        self.assertEqual(self.client.get('/api/listings/?view=huge').status_code, 400)
+        self.assertEqual(self.client.get('/api/listings/search/?q=card&fields=nope').status_code, 400)
+
+
+class ListingRowsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = create_user()
+        Listing.objects.create(
+            title='Café   listing', location='Kasarani, Nairobi', price='12500.5', rating=4.5,
+            description='Near the stadium', owner=self.owner, image_urls=['a.jpg', 'b.jpg'], amenities=['Wifi'],
+        )
+        StoredImage.objects.create(name='a.jpg', has_derivatives=True)
+        Listing.objects.create(
+            title='Unmapped', location='Somewhere else', price=9000, rating=3, description='', owner=self.owner,
+        )
+
+    def test_rows_match_the_serializer(self):
+        request = APIClient().get('/api/listings/').wsgi_request
+        listings = Listing.objects.order_by('l_id')
+        expected = ListingSerializer(listings, many=True, context={'request': request}).data
+
+        rows = ListingRows(request)
+        self.assertEqual(rows.serialize(rows.values(listings)), expected)
+
+        rows = ListingRows(request, fields=['title', 'image_srcset'])
+        self.assertEqual(
+            rows.serialize(rows.values(listings)),
+            [{'title': row['title'], 'image_srcset': row['image_srcset']} for row in expected],
+        )
+
+    def test_renderer_matches_json_renderer(self):
+        data = ListingSerializer(Listing.objects.all(), many=True).data
+        payload = {'results': data, 'when': Listing.objects.first().created_at, 'ids': {1: True}}
+        self.assertEqual(ListingJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_feed_and_owner_listings_use_the_fast_path(self):
+        feed = self.client.get('/api/listings/?page_size=1').json()
+        self.assertEqual(feed['results'][0]['title'], 'Unmapped')
+        self.assertEqual(self.client.get(feed['next']).json()['results'][0]['price'], '12500.50')
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        body = client.get('/api/owner/listings/').json()
+        self.assertEqual(body['count'], 2)
+        self.assertEqual(body['listings'][1]['image_urls'], ['http://testserver/uploads/a.jpg', 'http://testserver/uploads/b.jpg'])
@@ -1,8 +1,15 @@
-from django.urls import path
-from .views import get_all_listings, get_listing_by_id, create_listing, update_listing, delete_listing
+from django.urls import path, re_path
+from .views import (
+    get_all_listings, get_listing_by_id, create_listing, update_listing, delete_listing, search_listings, get_listing_facets,
+    get_nearby_listings, get_listings_in_bbox,
+)
 
 urlpatterns = [
     path('', get_all_listings, name='get_all_listings'),  # GET /api/listings/
+    re_path(r'^search/?$', search_listings, name='search_listings'),  # GET /api/listings/search?q=
+    path('nearby/', get_nearby_listings, name='get_nearby_listings'),  # GET /api/listings/nearby/?lat=&lng=&radius_km=3
+    path('within/', get_listings_in_bbox, name='get_listings_in_bbox'),  # GET /api/listings/within/?bbox=w,s,e,n
+    path('facets/', get_listing_facets, name='get_listing_facets'),  # GET /api/listings/facets/?amenities=gym
     path('<int:l_id>/', get_listing_by_id, name='get_listing_by_id'),  # GET /api/listings/1/
     path('create/', create_listing, name='create_listing'),  # POST /api/listings/create/
     path('<int:l_id>/update/', update_listing, name='update_listing'),  # PUT /api/listings/1/update/
@@ -1,51 +1,248 @@
-from django.conf import settings
+import math
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.decorators import api_view, parser_classes
+from rest_framework.decorators import api_view, parser_classes, renderer_classes
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-from .models import Listing
-from .serializers import ListingSerializer
-import os
+from rest_framework.utils.urls import replace_query_param
+from django.db.models import Count
+from .models import Listing, ListingAmenity
+from .serializers import ListingRows, ListingSerializer, listing_representation
+from .pagination import ListingCursorPagination
+from .filters import filter_listings, InvalidFilter
+from . import geo, search
+from .cache import cached_listing_response
+from .renderers import LISTING_RENDERERS
+from . import images
+
+# Widest map viewport, in degrees, accepted by get_listings_in_bbox; about the
+# 100 km across of the largest get_nearby_listings circle
+MAX_BBOX_SPAN = 1.0
 
 # ✅ Get all listings
 @api_view(['GET'])
+@renderer_classes(LISTING_RENDERERS)
+@cached_listing_response('list')
 def get_all_listings(request):
-    listings = Listing.objects.all()
-    
-    # Process each listing
-    for listing in listings:
-        # Convert image_urls to array if it's a string
-        if isinstance(listing.image_urls, str):
-            listing.image_urls = listing.image_urls.split(',')
-            listing.image_urls = [img.strip() for img in listing.image_urls if img.strip()]
-        
-        # Convert amenities to array if it's a string
-        if isinstance(listing.amenities, str):
-            listing.amenities = listing.amenities.split(',')
-            listing.amenities = [amenity.strip() for amenity in listing.amenities if amenity.strip()]
-    
-    serializer = ListingSerializer(listings, many=True, context={'request': request})
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    """
+    Return listings, newest first, narrowed by the search filters in
+    ``filters.filter_listings`` (location, price range, rating, amenities, status).
+
+    Passing ``page_size`` or ``cursor`` switches to the cursor-paginated feed:
+    only one page of ``status`` listings (``active`` by default) is fetched and
+    the response carries ``next``/``previous`` links with opaque cursors.
+
+    ``view=card`` returns compact cards and ``fields=`` a sparse fieldset;
+    either way only the columns those fields need are loaded. Full listings
+    are built from ``.values()`` rows by ListingRows rather than the serializer.
+    """
+    params = request.query_params
+    paginated = 'page_size' in params or 'cursor' in params
+    try:
+        serializer_class, fields = listing_representation(params)
+        listings = filter_listings(
+            Listing.objects.all(), params, default_status='active' if paginated else None
+        )
+    except ValueError as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if serializer_class is ListingSerializer:
+        rows = ListingRows(request, fields)
+        listings, serialize = rows.values(listings), rows.serialize
+    else:
+        listings = serializer_class.load(listings, fields)
+
+        def serialize(page):
+            return serializer_class(page, many=True, fields=fields, context={'request': request}).data
+
+    if paginated:
+        paginator = ListingCursorPagination()
+        page = paginator.paginate_queryset(listings, request)
+        return paginator.get_paginated_response(serialize(page))
+
+    return Response(serialize(listings), status=status.HTTP_200_OK)
+
+# ✅ Full-text search
+@api_view(['GET'])
+@renderer_classes(LISTING_RENDERERS)
+@cached_listing_response('list')
+def search_listings(request):
+    """
+    Ranked full-text search over title, location and description (``?q=``).
+    Accepts ``view`` and ``fields`` like ``get_all_listings``.
+    """
+    query = request.query_params.get('q', '').strip()
+    try:
+        serializer_class, fields = listing_representation(request.query_params)
+    except ValueError as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+    except ValueError:
+        return Response({'message': "'limit' and 'offset' must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+    l_ids = search.search_listing_ids(
+        query, status=request.query_params.get('status', 'active'), limit=limit, offset=offset
+    )
+    listings = serializer_class.load(Listing.objects.all(), fields).in_bulk(l_ids)
+    ranked = [listings[l_id] for l_id in l_ids if l_id in listings]
+
+    serializer = serializer_class(ranked, many=True, fields=fields, context={'request': request})
+    return Response({'query': query, 'results': serializer.data}, status=status.HTTP_200_OK)
+
+# ✅ Facet counts
+@api_view(['GET'])
+@cached_listing_response('list')
+def get_listing_facets(request):
+    """
+    Amenity and location counts for the listings matching the same filters as
+    ``get_all_listings`` (``active`` listings unless ``status`` is given).
+    ``facet_limit`` caps each facet list (default 50, at most 200).
+    """
+    params = request.query_params
+    try:
+        limit = max(1, min(int(params.get('facet_limit', 50)), 200))
+        listings = filter_listings(Listing.objects.all(), params, default_status='active')
+    except ValueError as e:
+        message = str(e) if isinstance(e, InvalidFilter) else "'facet_limit' must be an integer"
+        return Response({'message': message}, status=status.HTTP_400_BAD_REQUEST)
+
+    listings = listings.order_by()
+    amenities = (
+        ListingAmenity.objects.filter(listing__in=listings.values('l_id'))
+        .values('amenity__name').annotate(count=Count('listing_id'))
+        .order_by('-count', 'amenity__name')[:limit]
+    )
+    locations = (
+        listings.values('location').annotate(count=Count('l_id'))
+        .order_by('-count', 'location')[:limit]
+    )
+    return Response({
+        'total': listings.count(),
+        'amenities': [{'name': row['amenity__name'], 'count': row['count']} for row in amenities],
+        'locations': [{'location': row['location'], 'count': row['count']} for row in locations],
+    }, status=status.HTTP_200_OK)
+
+def _distance_page(request, listings, origin, radius_km=None):
+    """
+    One ``limit``/``offset`` page of ``listings`` ordered by distance from
+    ``origin``. Only ids and coordinates are read for the candidates; full
+    rows are loaded for the page alone, in the ``view``/``fields`` requested.
+    """
+    try:
+        serializer_class, fields = listing_representation(request.query_params)
+    except ValueError as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+    except ValueError:
+        return Response({'message': "'limit' and 'offset' must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+    distances = []
+    for l_id, latitude, longitude in listings.values_list('l_id', 'latitude', 'longitude'):
+        distance = geo.haversine_km(origin[0], origin[1], latitude, longitude)
+        if radius_km is None or distance <= radius_km:
+            distances.append((distance, l_id))
+    distances.sort()
+
+    page = distances[offset:offset + limit]
+    rows = serializer_class.load(Listing.objects.all(), fields).in_bulk([l_id for _, l_id in page])
+    results = serializer_class(
+        [rows[l_id] for _, l_id in page], many=True, fields=fields, context={'request': request}
+    ).data
+    for (distance, _), data in zip(page, results):
+        data['distance_km'] = round(distance, 3)
+
+    next_url = None
+    if offset + limit < len(distances):
+        next_url = replace_query_param(request.build_absolute_uri(), 'offset', offset + limit)
+    return Response({'count': len(distances), 'next': next_url, 'results': results}, status=status.HTTP_200_OK)
+
+
+def _coordinate(params, name, low, high):
+    try:
+        value = float(params[name])
+    except (KeyError, ValueError):
+        raise InvalidFilter(f"'{name}' must be a number")
+    if not low <= value <= high:
+        raise InvalidFilter(f"'{name}' must be between {low} and {high}")
+    return value
+
+
+# ✅ Listings within a radius
+@api_view(['GET'])
+@renderer_classes(LISTING_RENDERERS)
+@cached_listing_response('list')
+def get_nearby_listings(request):
+    """
+    Listings within ``radius_km`` (default 3, at most 50) of ``lat``/``lng``,
+    nearest first. Accepts the ``get_all_listings`` filters.
+    """
+    params = request.query_params
+    try:
+        latitude = _coordinate(params, 'lat', -90, 90)
+        longitude = _coordinate(params, 'lng', -180, 180)
+        radius_km = float(params.get('radius_km', 3))
+        if not (math.isfinite(radius_km) and radius_km > 0):
+            raise ValueError
+        radius_km = min(radius_km, 50)
+        listings = filter_listings(Listing.objects.all(), params, default_status='active')
+    except ValueError as e:
+        message = str(e) if isinstance(e, InvalidFilter) else "'radius_km' must be a positive number"
+        return Response({'message': message}, status=status.HTTP_400_BAD_REQUEST)
+
+    listings = listings.filter(geo.bbox_filter(*geo.radius_bbox(latitude, longitude, radius_km)))
+    return _distance_page(request, listings.order_by(), (latitude, longitude), radius_km)
+
+
+# ✅ Listings in a map viewport
+@api_view(['GET'])
+@renderer_classes(LISTING_RENDERERS)
+@cached_listing_response('list')
+def get_listings_in_bbox(request):
+    """
+    Listings inside ``bbox=min_lng,min_lat,max_lng,max_lat`` (at most
+    MAX_BBOX_SPAN degrees each way), nearest to ``lat``/``lng`` (the box
+    centre by default) first. Accepts the ``get_all_listings`` filters.
+    """
+    params = request.query_params
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(value) for value in params.get('bbox', '').split(','))
+    except ValueError:
+        return Response(
+            {'message': "'bbox' must be min_lng,min_lat,max_lng,max_lat"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= max_lng <= 180):
+        return Response({'message': "'bbox' is not a valid box"}, status=status.HTTP_400_BAD_REQUEST)
+    if max_lat - min_lat > MAX_BBOX_SPAN or max_lng - min_lng > MAX_BBOX_SPAN:
+        return Response(
+            {'message': f"'bbox' must span at most {MAX_BBOX_SPAN:g} degrees each way"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        origin = ((min_lat + max_lat) / 2, (min_lng + max_lng) / 2)
+        if 'lat' in params or 'lng' in params:
+            origin = (_coordinate(params, 'lat', -90, 90), _coordinate(params, 'lng', -180, 180))
+        listings = filter_listings(Listing.objects.all(), params, default_status='active')
+    except InvalidFilter as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    listings = listings.filter(geo.bbox_filter(min_lat, min_lng, max_lat, max_lng))
+    return _distance_page(request, listings.order_by(), origin)
 
 # ✅ Get single listing
 @api_view(['GET'])
+@cached_listing_response('detail')
 def get_listing_by_id(request, l_id):
     try:
-        listing = Listing.objects.get(l_id=l_id)
-
-        # Convert image_urls to array if it's a string
-        if isinstance(listing.image_urls, str):
-            listing.image_urls = listing.image_urls.split(',')
-            listing.image_urls = [img.strip() for img in listing.image_urls if img.strip()]
-            
-        # Convert amenities to array if it's a string
-        if isinstance(listing.amenities, str):
-            listing.amenities = listing.amenities.split(',')
-            listing.amenities = [amenity.strip() for amenity in listing.amenities if amenity.strip()]
-
-        serializer = ListingSerializer(listing, context={'request': request})
+        serializer_class, fields = listing_representation(request.query_params)
+    except ValueError as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        listing = serializer_class.load(Listing.objects.all(), fields).get(l_id=l_id)
+        serializer = serializer_class(listing, fields=fields, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Listing.DoesNotExist:
         return Response({'message': 'Listing not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -57,20 +254,19 @@ def create_listing(request):
     data = request.data
     image_files = request.FILES.getlist('images')
 
-    # Save images and store only filenames
-    image_filenames = []
-    for image in image_files:
-        filename = default_storage.save(os.path.join("uploads", image.name), ContentFile(image.read()))
-        image_filenames.append(os.path.basename(filename))  # Store only the filename
+    # Save images (deduplicated by content) and store only filenames;
+    # thumbnails are rendered in the background
+    try:
+        image_filenames = images.save_uploads(image_files)
+    except images.UnsupportedImage as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     # Generate new l_id
     last_listing = Listing.objects.order_by('-l_id').first()
     new_lid = (last_listing.l_id + 1) if last_listing else 1
     
-    # Process amenities
+    # Comma-separated form input is split into a list when the listing is saved
     amenities = data.get('amenities', '')
-    if isinstance(amenities, str):
-        amenities = amenities.split(',')
 
     new_listing = Listing(
         l_id=new_lid,
@@ -100,27 +296,18 @@ def update_listing(request, l_id):
     image_files = request.FILES.getlist('newImages')
 
     # Append new images
-    new_image_filenames = []
-    for image in image_files:
-        filename = default_storage.save(os.path.join("uploads", image.name), ContentFile(image.read()))
-        new_image_filenames.append(os.path.basename(filename))
-
-    # Get existing images as a list
-    existing_images = []
-    if isinstance(listing.image_urls, str):
-        existing_images = listing.image_urls.split(',')
-        existing_images = [img.strip() for img in existing_images if img.strip()]
-    elif isinstance(listing.image_urls, list):
-        existing_images = listing.image_urls
+    try:
+        new_image_filenames = images.save_uploads(image_files)
+    except images.UnsupportedImage as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    existing_images = listing.image_urls
 
     # Merge old and new images
     updated_images = existing_images + new_image_filenames
     
-    # Process amenities
+    # Comma-separated form input is split into a list when the listing is saved
     amenities = data.get('amenities', listing.amenities)
-    if isinstance(amenities, str):
-        amenities = amenities.split(',')
-        amenities = [amenity.strip() for amenity in amenities if amenity.strip()]
 
     # Update fields
     listing.title = data.get('title', listing.title)
@@ -141,21 +328,7 @@ def update_listing(request, l_id):
 def delete_listing(request, l_id):
     try:
         listing = Listing.objects.get(l_id=l_id)
-
-        # Delete associated images
-        image_urls = []
-        if isinstance(listing.image_urls, str):
-            image_urls = listing.image_urls.split(',')
-        elif isinstance(listing.image_urls, list):
-            image_urls = listing.image_urls
-            
-        for img in image_urls:
-            img = img.strip()
-            if img:
-                image_path = os.path.join(settings.MEDIA_ROOT, img)
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-
+        # The post_delete signal releases its images; files shared with other listings are kept
         listing.delete()
         return Response({'message': 'Listing deleted successfully'}, status=status.HTTP_200_OK)
     except Listing.DoesNotExist:
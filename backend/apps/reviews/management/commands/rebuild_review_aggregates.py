@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Case, Count, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.lookups import Exact
+from django.utils import timezone
+from apps.listings.cache import invalidate_listing
+from apps.listings.models import Listing
+from apps.reviews.models import Review
+
+
+def rebuild_review_aggregates():
+    """
+    Recompute review_count/rating_sum/average_rating from the reviews in one
+    UPDATE; returns the rows fixed.
+    """
+    reviews = Review.objects.filter(listing=OuterRef('l_id')).order_by().values('listing')
+    review_count = Coalesce(
+        Subquery(reviews.annotate(n=Count('*')).values('n'), output_field=IntegerField()), 0
+    )
+    rating_sum = Coalesce(
+        Subquery(reviews.annotate(total=Sum('rating')).values('total'), output_field=IntegerField()), 0
+    )
+    average_rating = Case(
+        When(Exact(review_count, 0), then=Value(0.0)),
+        default=Cast(rating_sum, FloatField()) / Cast(review_count, FloatField()),
+        output_field=FloatField(),
+    )
+    # Only rows that drifted are written, and marked changed for incremental exports
+    return Listing.objects.exclude(review_count=review_count, rating_sum=rating_sum).update(
+        review_count=review_count,
+        rating_sum=rating_sum,
+        average_rating=average_rating,
+        updated_at=timezone.now(),
+    )
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized review aggregates stored on each listing"
+
+    def handle(self, *args, **options):
+        fixed = rebuild_review_aggregates()
+        if fixed:
+            invalidate_listing()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt review aggregates for {fixed} listings"))
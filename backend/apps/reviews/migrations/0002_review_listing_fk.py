@@ -0,0 +1,61 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+INDEX_NAME = 'reviews_listing_created_idx'
+
+
+def create_listing_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        # Build without blocking writes to the reviews table
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON apps_reviews (l_id, created_at)"
+        )
+    else:
+        # InnoDB builds secondary indexes online; SQLite has no concurrent writers to block
+        schema_editor.execute(f"CREATE INDEX {INDEX_NAME} ON apps_reviews (l_id, created_at)")
+
+
+def drop_listing_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(f"DROP INDEX {INDEX_NAME} ON apps_reviews")
+    else:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    """
+    Turn the bare l_id integer into a ForeignKey to Listing without touching
+    the table: the field keeps its l_id column and skips the FK constraint, so
+    the only DDL is building the (l_id, created_at) index.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ('listings', '0006_listing_review_aggregates'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='review',
+                    old_name='l_id',
+                    new_name='listing',
+                ),
+                migrations.AlterField(
+                    model_name='review',
+                    name='listing',
+                    field=models.ForeignKey(db_column='l_id', db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='listings.listing'),
+                ),
+                migrations.AddIndex(
+                    model_name='review',
+                    index=models.Index(fields=['listing', 'created_at'], name=INDEX_NAME),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_listing_index, drop_listing_index),
+            ],
+        ),
+    ]
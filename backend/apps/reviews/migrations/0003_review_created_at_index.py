@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_listing_updated_at_index'),
+        ('reviews', '0002_review_listing_fk'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['created_at'], name='reviews_created_idx'),
+        ),
+    ]
@@ -2,7 +2,17 @@ from django.db import models
 
 class Review(models.Model):
     review_id = models.AutoField(primary_key=True)
-    l_id = models.IntegerField()  # Refers to Listing
+    # Stored in the original l_id column. No database constraint so existing
+    # rows were adopted without rewriting the table; (listing, created_at)
+    # below is the index for per-listing lookups.
+    listing = models.ForeignKey(
+        'listings.Listing',
+        on_delete=models.CASCADE,
+        related_name='reviews',
+        db_column='l_id',
+        db_constraint=False,
+        db_index=False,
+    )
     user = models.EmailField()
     # user_image = models.URLField(blank=True, null=True) // define this in db and set it to be extraced from user's email
     rating = models.IntegerField()
@@ -12,6 +22,10 @@ class Review(models.Model):
     class Meta:
         db_table = "apps_reviews"  # Use existing MySQL table
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['listing', 'created_at'], name='reviews_listing_created_idx'),
+            models.Index(fields=['created_at'], name='reviews_created_idx'),
+        ]
 
     def __str__(self):
-        return f"Review {self.review_id} - Listing {self.l_id}"
+        return f"Review {self.review_id} - Listing {self.listing_id}"
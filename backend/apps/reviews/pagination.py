@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ReviewCursorPagination(CursorPagination):
+    """Newest-first keyset pagination; per listing it walks the (listing, created_at) index."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-review_id')
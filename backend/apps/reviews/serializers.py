@@ -1,15 +1,22 @@
 from rest_framework import serializers
+from apps.listings.models import Listing
 from .models import Review
 import hashlib
 
+def gravatar_url(email):
+    email_hash = hashlib.md5(email.encode('utf-8')).hexdigest()
+    return f"https://www.gravatar.com/avatar/{email_hash}?d=identicon"
+
 class ReviewSerializer(serializers.ModelSerializer):
+    l_id = serializers.PrimaryKeyRelatedField(source='listing', queryset=Listing.objects.all())
     date = serializers.DateTimeField(source="created_at", format="%Y-%m-%d %H:%M:%S", read_only=True)
     avatar = serializers.SerializerMethodField()
+    # Ratings feed Listing.rating_sum, a positive integer column
+    rating = serializers.IntegerField(min_value=1, max_value=5)
 
     class Meta:
         model = Review
         fields = ['review_id', 'l_id', 'user', 'rating', 'comment', 'date', 'avatar']
 
     def get_avatar(self, obj):
-        email_hash = hashlib.md5(obj.user.encode('utf-8')).hexdigest()
-        return f"https://www.gravatar.com/avatar/{email_hash}?d=identicon"
+        return gravatar_url(obj.user)
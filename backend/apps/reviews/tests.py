@@ -0,0 +1,108 @@
+import json
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.listings.models import Listing
+from apps.users.models import UserProfile
+from .models import Review
+
+
+class ReviewAggregateTestCase(TestCase):
+    def setUp(self):
+        owner = UserProfile.objects.create(
+            uid='owner_1', username='owner', email='owner@example.com', role='owner'
+        )
+        self.admin = UserProfile.objects.create(
+            uid='admin_1', username='admin', email='admin@example.com', role='admin', is_staff=True
+        )
+        self.listing = Listing.objects.create(
+            title='Ridge Apartments', location='Kasarani, Nairobi', price=18000, rating=5,
+            description='', owner=owner,
+        )
+
+    def add_review(self, rating):
+        return self.client.post(
+            f'/api/reviews/{self.listing.l_id}/add/',
+            {'user': 'hunter@example.com', 'rating': rating, 'comment': 'Nice'},
+            content_type='application/json',
+        )
+
+    def test_add_and_delete_keep_aggregates_current(self):
+        self.add_review(4)
+        response = self.add_review(5)
+        self.assertEqual(response.status_code, 201)
+
+        body = self.client.get(f'/api/reviews/{self.listing.l_id}/').json()
+        self.assertEqual(body['totalReviews'], 2)
+        self.assertEqual(body['averageRating'], 4.5)
+
+        admin_client = APIClient()
+        admin_client.force_authenticate(self.admin)
+        for review in Review.objects.all():
+            response = admin_client.delete(f'/api/reviews/delete/{review.review_id}/')
+            self.assertEqual(response.status_code, 204)
+
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.review_count, self.listing.rating_sum), (0, 0))
+        self.assertEqual(self.listing.average_rating, 0)
+
+    def test_out_of_range_ratings_are_rejected(self):
+        self.add_review(4)
+        for rating in (-3, 0, 7):
+            self.assertEqual(self.add_review(rating).status_code, 400)
+
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.review_count, self.listing.rating_sum), (1, 4))
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_rebuild_command_recomputes_from_reviews(self):
+        unreviewed = Listing.objects.create(
+            title='Quiet Court', location='Westlands, Nairobi', price=9000, rating=3,
+            description='', owner=self.listing.owner,
+        )
+        for rating in (3, 4, 4):
+            Review.objects.create(listing=self.listing, user='hunter@example.com', rating=rating, comment='')
+
+        call_command('rebuild_review_aggregates', stdout=StringIO())
+
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.review_count, self.listing.rating_sum), (3, 11))
+        self.assertAlmostEqual(self.listing.average_rating, 11 / 3)
+
+        # Rows already in step keep their updated_at, so exports don't pick them up again
+        self.assertEqual(Listing.objects.get(pk=unreviewed.pk).updated_at, unreviewed.updated_at)
+        out = StringIO()
+        call_command('rebuild_review_aggregates', stdout=out)
+        self.assertIn('for 0 listings', out.getvalue())
+        self.assertEqual(Listing.objects.get(pk=self.listing.pk).updated_at, self.listing.updated_at)
+
+    def test_listing_reviews_are_cursor_paginated(self):
+        for rating in range(1, 6):
+            Review.objects.create(listing=self.listing, user='hunter@example.com', rating=rating, comment='')
+
+        body = self.client.get(f'/api/reviews/{self.listing.l_id}/?page_size=2').json()
+        seen = [review['review_id'] for review in body['reviews']]
+        while body['next']:
+            body = self.client.get(body['next']).json()
+            seen += [review['review_id'] for review in body['reviews']]
+
+        self.assertEqual(seen, list(self.listing.reviews.order_by('-created_at', '-review_id')
+                                    .values_list('review_id', flat=True)))
+
+    def test_review_list_is_paginated_and_streams_for_admins(self):
+        for rating in range(1, 4):
+            Review.objects.create(listing=self.listing, user='hunter@example.com', rating=rating, comment='')
+
+        body = self.client.get('/api/reviews/?page_size=2').json()
+        self.assertEqual(len(body['results']), 2)
+        self.assertIsNotNone(body['next'])
+
+        self.assertEqual(self.client.get('/api/reviews/?export=ndjson').status_code, 403)
+
+        admin_client = APIClient()
+        admin_client.force_authenticate(self.admin)
+        response = admin_client.get('/api/reviews/?export=ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['rating'] for row in rows], [1, 2, 3])
+        self.assertEqual(rows[0]['l_id'], self.listing.l_id)
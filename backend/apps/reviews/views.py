@@ -1,27 +1,70 @@
-from django.db import models
-from django.db.models import Avg  # Import Avg for aggregation
+import json
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAdminUser
 from rest_framework import status
+from apps.listings.cache import invalidate_listing
+from apps.listings.models import Listing
 from .models import Review
-from .serializers import ReviewSerializer
+from .serializers import ReviewSerializer, gravatar_url
+from .pagination import ReviewCursorPagination
+
+def stream_reviews_ndjson(queryset, chunk_size=2000):
+    """Yield one JSON line per review, reading the table in chunks so memory stays flat."""
+    rows = queryset.order_by('review_id').values(
+        'review_id', 'listing_id', 'user', 'rating', 'comment', 'created_at'
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield json.dumps({
+            'review_id': row['review_id'],
+            'l_id': row['listing_id'],
+            'user': row['user'],
+            'rating': row['rating'],
+            'comment': row['comment'],
+            'date': row['created_at'].strftime('%Y-%m-%d %H:%M:%S'),
+            'avatar': gravatar_url(row['user']),
+        }) + '\n'
 
 class ReviewListView(generics.ListAPIView):
+    """
+    Cursor-paginated list of every review.
+
+    Admins can pass ``?export=ndjson`` to stream the whole table as
+    newline-delimited JSON instead.
+    """
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    pagination_class = ReviewCursorPagination
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('export') != 'ndjson':
+            return super().list(request, *args, **kwargs)
+
+        if not IsAdminUser().has_permission(request, self):
+            self.permission_denied(request)
+        response = StreamingHttpResponse(
+            stream_reviews_ndjson(self.get_queryset()), content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="reviews.ndjson"'
+        return response
 
 class ReviewByListingView(APIView):
     def get(self, request, l_id):
-        reviews = Review.objects.filter(l_id=l_id).order_by('-created_at')
-        total_reviews = reviews.count()  # Ensure total_reviews is defined
-        average_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0  # Use imported Avg
+        paginator = ReviewCursorPagination()
+        reviews = paginator.paginate_queryset(Review.objects.filter(listing_id=l_id), request, view=self)
+        # Totals are kept on the listing by AddReviewView/DeleteReviewView
+        aggregates = Listing.objects.filter(l_id=l_id).values('review_count', 'average_rating').first()
+        aggregates = aggregates or {'review_count': 0, 'average_rating': 0}
         
         return Response({
             "reviews": ReviewSerializer(reviews, many=True).data,
-            "averageRating": round(average_rating, 1),
-            "totalReviews": total_reviews  # No more undefined variable error
+            "averageRating": round(aggregates['average_rating'], 1),
+            "totalReviews": aggregates['review_count'],
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
         })
 
 class AddReviewView(APIView):
@@ -31,7 +74,10 @@ class AddReviewView(APIView):
 
         serializer = ReviewSerializer(data=data)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                review = serializer.save()
+                Listing.record_review(review.listing_id, review.rating)
+                transaction.on_commit(lambda: invalidate_listing(review.listing_id))
             return Response({"message": "Review added successfully", "review": serializer.data}, status=status.HTTP_201_CREATED)
 
         print(serializer.errors)  # Log errors for debugging
@@ -42,8 +88,11 @@ class DeleteReviewView(APIView):
 
     def delete(self, request, review_id):
         try:
-            review = Review.objects.get(id=review_id)
-            review.delete()
+            with transaction.atomic():
+                review = Review.objects.select_for_update().get(review_id=review_id)
+                review.delete()
+                Listing.record_review(review.listing_id, review.rating, count=-1)
+                transaction.on_commit(lambda: invalidate_listing(review.listing_id))
             return Response({"message": "Review deleted successfully"}, status=204)
         except Review.DoesNotExist:
             return Response({"error": "Review not found"}, status=404)
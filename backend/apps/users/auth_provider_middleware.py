@@ -26,40 +26,13 @@ def auth_provider_middleware(get_response):
         # Based on the provider header, choose the appropriate auth method
         if auth_provider == 'clerk':
             # Use Clerk authentication
-            from .clerk_auth import verify_clerk_token, get_user_from_clerk
-            from django.contrib.auth import get_user_model
-            
-            User = get_user_model()
+            from .clerk_auth import verify_clerk_token, resolve_clerk_user
             
             # Verify Clerk token
             payload = verify_clerk_token(token)
             if payload:
-                clerk_user_id = payload.get('sub')
-                
-                if clerk_user_id:
-                    # Try to find user in database
-                    try:
-                        user = User.objects.get(uid=clerk_user_id)
-                        request.user = user
-                    except User.DoesNotExist:
-                        # Get user info from Clerk
-                        clerk_user = get_user_from_clerk(clerk_user_id)
-                        
-                        if clerk_user:
-                            # Extract role from metadata
-                            role = clerk_user.get('public_metadata', {}).get('role', 'hunter')
-                            email = clerk_user.get('email_addresses', [{}])[0].get('email_address', '')
-                            username = email.split('@')[0] if email else clerk_user_id[:8]
-                            
-                            # Create user in database
-                            user = User.objects.create(
-                                uid=clerk_user_id,
-                                email=email,
-                                username=username,
-                                role=role,
-                                is_active=True
-                            )
-                            request.user = user
+                # Cached uid lookup; first logins are provisioned in the background
+                resolve_clerk_user(request, payload)
             else:
                 return JsonResponse({"error": "Invalid Clerk token"}, status=401)
                 
@@ -0,0 +1,195 @@
+"""
+Shared HTTP client for the Clerk backend API.
+
+One ``requests.Session`` is reused for every call so connections are kept
+alive and pooled. Each call has strict connect/read timeouts and a bounded
+number of retries with full-jitter backoff; a circuit breaker stops calling
+Clerk for a while after repeated failures so a degraded API can't tie up
+workers. Latency and failure counts are collected in ``ClerkMetrics``.
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ClerkAPIError(Exception):
+    """Clerk could not be reached or kept failing after retries."""
+
+
+class ClerkUnavailable(ClerkAPIError):
+    """The circuit breaker is open; the call was not attempted."""
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects calls
+    for ``reset_timeout`` seconds, then lets a single trial call through
+    (half-open) to decide whether to close again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                return True
+            if self.state == self.HALF_OPEN:
+                # A trial call is already in flight
+                return False
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ClerkMetrics:
+    """Thread-safe counters and latency totals for Clerk API calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.failures = 0
+            self.retries = 0
+            self.short_circuited = 0
+            self.latency_total = 0.0
+            self.latency_max = 0.0
+
+    def observe(self, seconds, ok):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.failures += 1
+            self.latency_total += seconds
+            self.latency_max = max(self.latency_max, seconds)
+
+    def increment(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'failures': self.failures,
+                'retries': self.retries,
+                'short_circuited': self.short_circuited,
+                'latency_avg_ms': round(self.latency_total / self.requests * 1000, 2) if self.requests else 0,
+                'latency_max_ms': round(self.latency_max * 1000, 2),
+            }
+
+
+class ClerkAPIClient:
+    def __init__(self, base_url, api_key, connect_timeout=3.05, read_timeout=5,
+                 max_retries=2, backoff=0.2, pool_size=20, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = ClerkMetrics()
+
+        self.session = requests.Session()
+        # Retries are handled below, where they can be jittered and counted
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def request(self, method, path, **kwargs):
+        """
+        Send a request to Clerk and return the ``requests.Response``.
+
+        Connection errors, timeouts and 429/5xx answers are retried up to
+        ``max_retries`` times; other 4xx responses are returned as-is.
+        Raises ``ClerkUnavailable`` when the breaker is open and
+        ``ClerkAPIError`` when retries are exhausted.
+        """
+        if not self.breaker.allow():
+            self.metrics.increment('short_circuited')
+            raise ClerkUnavailable("Clerk API circuit is open")
+
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.metrics.increment('retries')
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.RequestException as e:
+                self.metrics.observe(time.monotonic() - started, ok=False)
+                error = e
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                self.metrics.observe(time.monotonic() - started, ok=False)
+                error = ClerkAPIError(f"Clerk API returned {response.status_code}")
+                continue
+
+            self.metrics.observe(time.monotonic() - started, ok=True)
+            self.breaker.record_success()
+            return response
+
+        self.breaker.record_failure()
+        raise ClerkAPIError(f"{method} {path} failed after {self.max_retries + 1} attempts: {error}")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide Clerk client configured from the CLERK_* settings."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ClerkAPIClient(
+                    getattr(settings, 'CLERK_API_URL', 'https://api.clerk.dev/v1'),
+                    getattr(settings, 'CLERK_API_KEY', ''),
+                    connect_timeout=getattr(settings, 'CLERK_CONNECT_TIMEOUT', 3.05),
+                    read_timeout=getattr(settings, 'CLERK_READ_TIMEOUT', 5),
+                    max_retries=getattr(settings, 'CLERK_MAX_RETRIES', 2),
+                    breaker=CircuitBreaker(
+                        failure_threshold=getattr(settings, 'CLERK_BREAKER_THRESHOLD', 5),
+                        reset_timeout=getattr(settings, 'CLERK_BREAKER_RESET', 30),
+                    ),
+                )
+    return _client
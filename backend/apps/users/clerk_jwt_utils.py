@@ -1,60 +1,194 @@
-import os
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
 import jwt
+import requests
 from django.conf import settings
 
-# Get environment variables or settings
-CLERK_JWT_VERIFICATION_KEY = os.environ.get('CLERK_JWT_VERIFICATION_KEY', getattr(settings, 'CLERK_JWT_VERIFICATION_KEY', None))
-CLERK_ISSUER = os.environ.get('CLERK_ISSUER', getattr(settings, 'CLERK_ISSUER', None))
+logger = logging.getLogger(__name__)
+
+
+class JWKSKeyStore:
+    """
+    Public keys from a JWKS document, cached by ``kid``.
+
+    Keys come from ``jwks_url`` or ``jwks_file``. An unknown ``kid`` triggers a
+    reload (at most once every ``refresh_interval`` seconds) so keys rotated
+    by Clerk are picked up without a restart. A static PEM ``fallback_key`` is
+    used for tokens without a ``kid`` or when no JWKS source is configured.
+    """
+
+    def __init__(self, jwks_url=None, jwks_file=None, fallback_key=None, refresh_interval=60):
+        self.jwks_url = jwks_url
+        self.jwks_file = jwks_file
+        # An unset or empty setting means there is no fallback key
+        self.fallback_key = fallback_key or None
+        self.refresh_interval = refresh_interval
+        self._keys = {}
+        self._last_refresh = None
+        self._lock = threading.Lock()
+
+    def _load_jwks(self):
+        if self.jwks_file:
+            with open(self.jwks_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        response = requests.get(self.jwks_url, timeout=(3.05, 5))
+        response.raise_for_status()
+        return response.json()
+
+    def refresh(self):
+        """Reload the JWKS document, replacing the cached keys."""
+        if not (self.jwks_url or self.jwks_file):
+            return
+        self._last_refresh = time.monotonic()
+        keys = {}
+        for jwk in self._load_jwks().get('keys', []):
+            if jwk.get('kid') and jwk.get('use', 'sig') == 'sig':
+                keys[jwk['kid']] = jwt.PyJWK(jwk).key
+        self._keys = keys
+
+    def get_key(self, kid):
+        if kid is None:
+            return self.fallback_key
+
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None and (
+                self._last_refresh is None
+                or time.monotonic() - self._last_refresh >= self.refresh_interval
+            ):
+                try:
+                    self.refresh()
+                except (OSError, ValueError, requests.RequestException, jwt.PyJWKError) as e:
+                    logger.warning("Could not load Clerk JWKS: %s", e)
+                key = self._keys.get(kid)
+        return key or self.fallback_key
+
+
+class VerifiedClaimsCache:
+    """Bounded LRU of verified token claims, keyed by token hash and valid until ``exp``."""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
 
-class ClerkJWTVerifier:
-    """Helper class for Clerk JWT verification operations"""
-    
     @staticmethod
-    def verify_token(token):
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def set(self, token, claims):
+        expires_at = claims.get('exp')
+        if not expires_at or self.max_size <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ClerkJWTVerifier:
+    """Verifies Clerk session tokens once, then serves repeat tokens from the claims cache."""
+
+    def __init__(self, key_store, issuer=None, audience=None, cache_size=10000, leeway=0):
+        self.key_store = key_store
+        self.issuer = issuer
+        self.audience = audience
+        self.leeway = leeway
+        self.claims_cache = VerifiedClaimsCache(cache_size)
+
+    def verify_token(self, token):
         """
         Verify a Clerk JWT token
-        
+
         Args:
             token (str): JWT token string
-            
+
         Returns:
             dict: Decoded token payload if valid, None otherwise
         """
-        if not CLERK_JWT_VERIFICATION_KEY:
-            raise ValueError("CLERK_JWT_VERIFICATION_KEY is not configured")
-            
-        if not CLERK_ISSUER:
-            raise ValueError("CLERK_ISSUER is not configured")
-            
+        claims = self.claims_cache.get(token)
+        if claims is not None:
+            return claims
+
         try:
-            # Using the verification key for JWT validation
-            payload = jwt.decode(
+            kid = jwt.get_unverified_header(token).get('kid')
+            key = self.key_store.get_key(kid)
+            if key is None:
+                logger.info("Token verification failed: no key for kid %s", kid)
+                return None
+
+            claims = jwt.decode(
                 token,
-                CLERK_JWT_VERIFICATION_KEY,
+                key,
                 algorithms=["RS256"],
-                options={"verify_signature": True},
-                audience="clerk",
-                issuer=CLERK_ISSUER
+                audience=self.audience or None,
+                issuer=self.issuer or None,
+                leeway=self.leeway,
+                options={"verify_aud": bool(self.audience), "require": ["exp", "sub"]},
             )
-            
-            # Verify required claims
-            if not payload.get('sub'):
-                print("Invalid token: Missing 'sub' claim")
-                return None
-                
-            return payload
-            
         except jwt.ExpiredSignatureError:
-            print("Token expired")
-            return None
-        except jwt.InvalidTokenError as e:
-            print(f"Invalid token: {e}")
+            logger.info("Token verification failed: token has expired")
             return None
-        except Exception as e:
-            print(f"Token verification error: {e}")
+        except jwt.PyJWTError as e:
+            # Also covers InvalidKeyError from a malformed configured key
+            logger.info("Token verification failed: %s", e)
             return None
-    
+
+        self.claims_cache.set(token, claims)
+        return claims
+
     @staticmethod
     def extract_user_id(payload):
         """Extract the Clerk user ID from token payload"""
-        return payload.get('sub') if payload else None
\ No newline at end of file
+        return payload.get('sub') if payload else None
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    """Process-wide verifier built from the CLERK_* settings."""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = ClerkJWTVerifier(
+                    JWKSKeyStore(
+                        jwks_url=getattr(settings, 'CLERK_JWKS_URL', None),
+                        jwks_file=getattr(settings, 'CLERK_JWKS_FILE', None),
+                        fallback_key=getattr(settings, 'CLERK_JWT_VERIFICATION_KEY', None),
+                    ),
+                    issuer=getattr(settings, 'CLERK_ISSUER', None),
+                    audience=getattr(settings, 'CLERK_AUDIENCE', None),
+                    cache_size=getattr(settings, 'CLERK_TOKEN_CACHE_SIZE', 10000),
+                )
+    return _verifier
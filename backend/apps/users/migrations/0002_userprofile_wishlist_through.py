@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Back UserProfile.wishlist with wishlist.Wishlist. Its rows were merged into
+    that table by wishlist 0002, so the old join table is dropped; adding a
+    through= M2M creates no table of its own.
+    """
+
+    dependencies = [
+        ('listings', '0008_listing_updated_at_index'),
+        ('users', '0001_initial'),
+        ('wishlist', '0002_consolidate_wishlist'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='wishlist',
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='wishlist',
+            field=models.ManyToManyField(blank=True, related_name='wishlisted_by', through='wishlist.Wishlist', to='listings.listing'),
+        ),
+    ]
@@ -8,7 +8,9 @@ class UserProfile(AbstractUser):
     role = models.CharField(max_length=20, choices=[('hunter', 'Hunter'), ('owner', 'Owner'), ('mover', 'Mover'), ('admin', 'Admin')])
     is_active = models.BooleanField(default=True)
 
-    wishlist = models.ManyToManyField("listings.Listing", related_name="wishlisted_by", blank=True)
+    wishlist = models.ManyToManyField(
+        "listings.Listing", through="wishlist.Wishlist", related_name="wishlisted_by", blank=True
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "uid"]
@@ -18,12 +20,10 @@ class UserProfile(AbstractUser):
         return self.role == "admin"
 
     def toggle_wishlist(self, listing):
-        """Toggle a listing in the user's wishlist."""
-        if listing in self.wishlist.all():
-            self.wishlist.remove(listing)
-        else:
-            self.wishlist.add(listing)
-        self.save()
+        """Toggle a listing in the user's wishlist; returns whether it is now in it."""
+        from apps.wishlist.models import Wishlist
+
+        return Wishlist.toggle(self, listing)
 
     def __str__(self):
         return self.username
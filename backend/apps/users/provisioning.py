@@ -0,0 +1,86 @@
+"""
+First-login provisioning of Clerk users, off the request path.
+
+The middleware calls ``schedule_provisioning`` when a verified token belongs to
+a uid with no local row. The Clerk API calls and the insert run on a small
+thread pool; concurrent requests for the same uid share one job, and the
+unique ``uid`` column settles races between processes.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, close_old_connections, transaction
+from . import user_cache
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='clerk-provision')
+_in_flight = {}
+_lock = threading.Lock()
+
+
+def provision_user(clerk_user_id, payload=None):
+    """Create the local UserProfile for a Clerk user and sync role metadata back to Clerk."""
+    from .clerk_auth import get_user_from_clerk, update_clerk_user_metadata
+
+    user = User.objects.filter(uid=clerk_user_id).first()
+    if user:
+        return user
+
+    clerk_user = get_user_from_clerk(clerk_user_id)
+    if not clerk_user:
+        return None
+
+    # Extract role from JWT metadata first, then from public_metadata
+    role = (payload or {}).get('metadata', {}).get('role')
+    if not role or role == 'user':
+        role = clerk_user.get('public_metadata', {}).get('role', 'hunter')
+
+    email = clerk_user.get('email_addresses', [{}])[0].get('email_address', '')
+    username = email.split('@')[0] if email else clerk_user_id[:8]
+
+    try:
+        with transaction.atomic():
+            user, created = User.objects.get_or_create(
+                uid=clerk_user_id,
+                defaults={'email': email, 'username': username, 'role': role, 'is_active': True},
+            )
+    except IntegrityError:
+        # Another process provisioned the same uid first
+        return User.objects.filter(uid=clerk_user_id).first()
+
+    if created:
+        # Update Clerk metadata with the role-specific ID
+        role_metadata = clerk_user.get('public_metadata', {})
+        role_metadata['role'] = role
+        if role in ('owner', 'hunter', 'mover'):
+            role_metadata[f'{role}_id'] = clerk_user_id
+        update_clerk_user_metadata(clerk_user_id, role_metadata)
+
+    user_cache.invalidate_user(clerk_user_id)
+    return user
+
+
+def _run(clerk_user_id, payload):
+    try:
+        return provision_user(clerk_user_id, payload)
+    except Exception:
+        logger.exception("Provisioning Clerk user %s failed", clerk_user_id)
+        return None
+    finally:
+        close_old_connections()
+        with _lock:
+            _in_flight.pop(clerk_user_id, None)
+
+
+def schedule_provisioning(clerk_user_id, payload=None):
+    """Queue provisioning for ``clerk_user_id`` unless a job for it is already running."""
+    with _lock:
+        future = _in_flight.get(clerk_user_id)
+        if future is None:
+            future = _executor.submit(_run, clerk_user_id, payload)
+            _in_flight[clerk_user_id] = future
+        return future
@@ -0,0 +1,208 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import SimpleTestCase, TestCase
+from . import provisioning, user_cache
+from .clerk_client import CircuitBreaker, ClerkAPIClient, ClerkAPIError, ClerkUnavailable
+from .clerk_jwt_utils import ClerkJWTVerifier, JWKSKeyStore
+from .models import UserProfile
+
+ISSUER = 'https://example.clerk.accounts.dev'
+
+
+def make_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({'kid': kid, 'use': 'sig', 'alg': 'RS256'})
+    return private_key, jwk
+
+
+def make_token(private_key, kid, **claims):
+    payload = {'sub': 'user_1', 'iss': ISSUER, 'exp': int(time.time()) + 60, **claims}
+    return jwt.encode(payload, private_key, algorithm='RS256', headers={'kid': kid})
+
+
+class ClerkJWTVerifierTestCase(SimpleTestCase):
+    def setUp(self):
+        self.key_a, jwk_a = make_key('key-a')
+        self.key_b, self.jwk_b = make_key('key-b')
+        fd, self.jwks_file = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.write_jwks([jwk_a])
+        self.verifier = ClerkJWTVerifier(
+            JWKSKeyStore(jwks_file=self.jwks_file, refresh_interval=0), issuer=ISSUER
+        )
+
+    def tearDown(self):
+        os.remove(self.jwks_file)
+
+    def write_jwks(self, keys):
+        with open(self.jwks_file, 'w') as f:
+            json.dump({'keys': keys}, f)
+
+    def test_verifies_once_then_serves_from_cache(self):
+        token = make_token(self.key_a, 'key-a')
+        with mock.patch('apps.users.clerk_jwt_utils.jwt.decode', wraps=jwt.decode) as decode:
+            self.assertEqual(self.verifier.verify_token(token)['sub'], 'user_1')
+            self.assertEqual(self.verifier.verify_token(token)['sub'], 'user_1')
+        self.assertEqual(decode.call_count, 1)
+
+    def test_unknown_kid_reloads_rotated_keys(self):
+        self.assertIsNotNone(self.verifier.verify_token(make_token(self.key_a, 'key-a')))
+        self.write_jwks([self.jwk_b])
+        self.assertIsNotNone(self.verifier.verify_token(make_token(self.key_b, 'key-b')))
+
+    def test_rejects_bad_tokens(self):
+        self.assertIsNone(self.verifier.verify_token(make_token(self.key_b, 'key-a')))
+        self.assertIsNone(self.verifier.verify_token(make_token(self.key_a, 'key-a', iss='https://evil.example')))
+        self.assertIsNone(self.verifier.verify_token(make_token(self.key_a, 'key-a', exp=int(time.time()) - 5)))
+
+    def test_missing_or_invalid_fallback_key_rejects_tokens(self):
+        token = jwt.encode(
+            {'sub': 'user_1', 'iss': ISSUER, 'exp': int(time.time()) + 60}, self.key_a, algorithm='RS256'
+        )
+        for fallback_key in ['', 'not a PEM key']:
+            verifier = ClerkJWTVerifier(JWKSKeyStore(fallback_key=fallback_key), issuer=ISSUER)
+            self.assertIsNone(verifier.verify_token(token))
+            self.assertIsNone(verifier.verify_token(make_token(self.key_a, 'key-a')))
+
+    def test_cached_claims_expire_with_the_token(self):
+        token = make_token(self.key_a, 'key-a', exp=int(time.time()) + 1)
+        self.assertIsNotNone(self.verifier.verify_token(token))
+        with mock.patch('apps.users.clerk_jwt_utils.time.time', return_value=time.time() + 5):
+            self.assertIsNone(self.verifier.claims_cache.get(token))
+
+
+class UserCacheTestCase(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = UserProfile.objects.create(
+            uid='user_1', username='hunter', email='hunter@example.com', role='hunter'
+        )
+
+    def test_repeat_lookups_skip_the_database(self):
+        self.assertEqual(user_cache.get_user('user_1').role, 'hunter')
+        with self.assertNumQueries(0):
+            cached = user_cache.get_user('user_1')
+        self.assertEqual((cached.pk, cached.uid), (self.user.pk, 'user_1'))
+        self.assertIsNot(cached, user_cache.get_user('user_1'))
+
+    def test_invalidation_picks_up_role_changes(self):
+        user_cache.get_user('user_1')
+        UserProfile.objects.filter(uid='user_1').update(role='owner')
+        self.assertEqual(user_cache.get_user('user_1').role, 'hunter')
+
+        user_cache.invalidate_user('user_1')
+        self.assertEqual(user_cache.get_user('user_1').role, 'owner')
+
+    def test_local_cache_is_bounded(self):
+        for i in range(2, 6):
+            UserProfile.objects.create(uid=f'user_{i}', username=f'user{i}', email=f'user{i}@example.com')
+        with self.settings(CLERK_USER_CACHE_SIZE=3):
+            for i in range(1, 6):
+                user_cache.get_user(f'user_{i}')
+        self.assertEqual(list(user_cache._local), ['user_3', 'user_4', 'user_5'])
+
+        with mock.patch('apps.users.user_cache.time.monotonic', return_value=time.monotonic() + 3600):
+            user_cache.get_user('user_1')
+        self.assertEqual(list(user_cache._local), ['user_1'])
+
+
+class ProvisioningTestCase(SimpleTestCase):
+    def test_concurrent_first_requests_share_one_job(self):
+        release = threading.Event()
+        calls = []
+
+        def slow_provision(clerk_user_id, payload=None):
+            calls.append(clerk_user_id)
+            release.wait(5)
+
+        with mock.patch.object(provisioning, 'provision_user', side_effect=slow_provision), \
+                mock.patch.object(provisioning, 'close_old_connections'):
+            first = provisioning.schedule_provisioning('user_new')
+            second = provisioning.schedule_provisioning('user_new')
+            release.set()
+            first.result(5)
+
+        self.assertIs(first, second)
+        self.assertEqual(calls, ['user_new'])
+
+
+class StubClerkHandler(BaseHTTPRequestHandler):
+    """Answers from the server's ``responses`` queue: (status, delay) per request."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        status, delay = self.server.responses.pop(0) if self.server.responses else (200, 0)
+        time.sleep(delay)
+        body = json.dumps({'id': self.path.rsplit('/', 1)[-1]}).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client already gave up on this request (read timeout)
+            self.close_connection = True
+
+    do_PATCH = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+class ClerkAPIClientTestCase(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubClerkHandler)
+        self.server.responses = []
+        self.server.paths = []
+        self.server.connections = 0
+        original_finish = self.server.finish_request
+
+        def counting_finish_request(request, client_address):
+            self.server.connections += 1
+            original_finish(request, client_address)
+
+        self.server.finish_request = counting_finish_request
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = ClerkAPIClient(
+            f'http://127.0.0.1:{self.server.server_port}/v1', 'sk_test',
+            connect_timeout=0.5, read_timeout=0.2, max_retries=2, backoff=0.01,
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        )
+
+    def tearDown(self):
+        self.client.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.client.request('GET', 'users/user_1').json(), {'id': 'user_1'})
+        self.assertEqual(self.server.connections, 1)
+
+    def test_server_errors_and_timeouts_are_retried(self):
+        self.server.responses = [(503, 0), (200, 0.5), (200, 0)]
+        self.assertEqual(self.client.request('GET', 'users/user_1').status_code, 200)
+        metrics = self.client.metrics.snapshot()
+        self.assertEqual((metrics['requests'], metrics['failures'], metrics['retries']), (3, 2, 2))
+
+    def test_breaker_opens_and_fails_fast(self):
+        self.server.responses = [(500, 0)] * 6
+        for _ in range(2):
+            with self.assertRaises(ClerkAPIError):
+                self.client.request('GET', 'users/user_1')
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.OPEN)
+
+        with self.assertRaises(ClerkUnavailable):
+            self.client.request('GET', 'users/user_1')
+        self.assertEqual(len(self.server.paths), 6)
+        self.assertEqual(self.client.metrics.snapshot()['short_circuited'], 1)
@@ -0,0 +1,98 @@
+"""
+Short-lived cache of ``uid -> UserProfile`` lookups for the auth middleware.
+
+Each process keeps its own TTL map; with ``CLERK_USER_CACHE_SHARED`` enabled a
+miss falls back to Django's cache (e.g. Redis) before the database. Entries
+store field values rather than model instances, so every request gets its own
+fresh ``UserProfile`` object. Other processes' local entries expire after
+``CLERK_USER_CACHE_TTL`` seconds, which bounds how long a role change can lag.
+The local map holds at most ``CLERK_USER_CACHE_SIZE`` uids.
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+
+User = get_user_model()
+
+# uid -> (expires_at, snapshot), oldest insert first
+_local = OrderedDict()
+_lock = threading.Lock()
+
+
+def _ttl():
+    return getattr(settings, 'CLERK_USER_CACHE_TTL', 30)
+
+
+def _max_size():
+    return getattr(settings, 'CLERK_USER_CACHE_SIZE', 10000)
+
+
+def _shared():
+    return getattr(settings, 'CLERK_USER_CACHE_SHARED', False)
+
+
+def _shared_key(uid):
+    return f'users:uid:{uid}'
+
+
+def _field_names():
+    return [field.attname for field in User._meta.concrete_fields]
+
+
+def _to_snapshot(user):
+    return tuple(getattr(user, name) for name in _field_names())
+
+
+def _from_snapshot(snapshot):
+    return User.from_db(router.db_for_read(User), _field_names(), snapshot)
+
+
+def _remember(uid, snapshot):
+    ttl = _ttl()
+    now = time.monotonic()
+    max_size = _max_size()
+    with _lock:
+        _local.pop(uid, None)
+        _local[uid] = (now + ttl, snapshot)
+        # Entries share one TTL, so insertion order is expiry order: drop
+        # expired entries and anything beyond the size limit from the front
+        while _local:
+            expires_at, _ = next(iter(_local.values()))
+            if expires_at > now and len(_local) <= max_size:
+                break
+            _local.popitem(last=False)
+    if _shared():
+        cache.set(_shared_key(uid), snapshot, ttl)
+
+
+def get_user(uid):
+    """Return the UserProfile for ``uid``, or None if it doesn't exist (misses are not cached)."""
+    entry = _local.get(uid)
+    if entry is not None and entry[0] > time.monotonic():
+        return _from_snapshot(entry[1])
+
+    snapshot = cache.get(_shared_key(uid)) if _shared() else None
+    if snapshot is None:
+        user = User.objects.filter(uid=uid).first()
+        if user is None:
+            return None
+        snapshot = _to_snapshot(user)
+    _remember(uid, snapshot)
+    return _from_snapshot(snapshot)
+
+
+def invalidate_user(uid):
+    """Forget ``uid`` after its row changes (e.g. a role update)."""
+    with _lock:
+        _local.pop(uid, None)
+    if _shared():
+        cache.delete(_shared_key(uid))
+
+
+def clear():
+    with _lock:
+        _local.clear()
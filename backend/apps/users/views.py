@@ -4,7 +4,9 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from .models import UserProfile
 from .serializers import UserSerializer
-from .clerk_auth import clerk_auth_required, verify_clerk_token, get_user_from_clerk
+from .clerk_auth import clerk_auth_required, require_role, verify_clerk_token, get_user_from_clerk
+from .clerk_client import get_client
+from . import user_cache
 
 @api_view(['GET'])
 @clerk_auth_required
@@ -13,6 +15,14 @@ def get_clerk_user_info(request):
     serializer = UserSerializer(request.user)
     return Response(serializer.data)
 
+@api_view(['GET'])
+@clerk_auth_required
+@require_role(['admin'])
+def get_clerk_api_metrics(request):
+    """Latency, failure and circuit breaker stats for outgoing Clerk API calls"""
+    client = get_client()
+    return Response({**client.metrics.snapshot(), 'circuit': client.breaker.state})
+
 @api_view(['POST'])
 def create_clerk_user(request):
     """Register a new user from Clerk authentication"""
@@ -51,6 +61,7 @@ def create_clerk_user(request):
                     "is_active": True
                 }
             )
+            user_cache.invalidate_user(clerk_user_id)
             
             serializer = UserSerializer(user)
             return Response(serializer.data)
@@ -109,6 +120,9 @@ def update_clerk_user_role(request):
                     is_active=True
                 )
             
+            # Drop the cached snapshot so the middleware sees the new role
+            user_cache.invalidate_user(clerk_user_id)
+            
             serializer = UserSerializer(user)
             return Response({
                 **serializer.data,
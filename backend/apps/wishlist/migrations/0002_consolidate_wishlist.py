@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_wishlists(apps, schema_editor):
+    """
+    Point wishlist rows at listings.Listing and fold in UserProfile.wishlist.
+
+    Rows whose shadow listing has no real listing are dropped, as are
+    duplicate (user, listing) pairs, keeping the oldest row.
+    """
+    Wishlist = apps.get_model('wishlist', 'Wishlist')
+    Listing = apps.get_model('listings', 'Listing')
+    UserProfile = apps.get_model('users', 'UserProfile')
+
+    existing = set(Listing.objects.values_list('l_id', flat=True))
+    seen, orphans, updated = set(), [], []
+    rows = Wishlist.objects.order_by('id').values_list('id', 'user_id', 'listing__l_id')
+    for row_id, user_id, l_id in rows.iterator():
+        if l_id not in existing or (user_id, l_id) in seen:
+            orphans.append(row_id)
+            continue
+        seen.add((user_id, l_id))
+        updated.append(Wishlist(id=row_id, new_listing_id=l_id))
+
+    for start in range(0, len(orphans), 500):
+        Wishlist.objects.filter(id__in=orphans[start:start + 500]).delete()
+    Wishlist.objects.bulk_update(updated, ['new_listing'], batch_size=500)
+
+    through = UserProfile.wishlist.through
+    missing = [
+        Wishlist(user_id=user_id, new_listing_id=l_id)
+        for user_id, l_id in through.objects.values_list('userprofile_id', 'listing_id').iterator()
+        if (user_id, l_id) not in seen
+    ]
+    Wishlist.objects.bulk_create(missing, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_listing_updated_at_index'),
+        ('users', '0001_initial'),
+        ('wishlist', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wishlist',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='wishlist',
+            name='new_listing',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='listings.listing'),
+        ),
+        migrations.AlterField(
+            model_name='wishlist',
+            name='listing',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='wishlist_entries', to='wishlist.listing'),
+        ),
+        migrations.RunPython(merge_wishlists, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='wishlist',
+            name='listing',
+        ),
+        migrations.DeleteModel(
+            name='Listing',
+        ),
+        migrations.RenameField(
+            model_name='wishlist',
+            old_name='new_listing',
+            new_name='listing',
+        ),
+        migrations.AlterField(
+            model_name='wishlist',
+            name='listing',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wishlist_entries', to='listings.listing'),
+        ),
+        migrations.AddIndex(
+            model_name='wishlist',
+            index=models.Index(fields=['user', 'created_at'], name='wishlist_wi_user_id_8199a6_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='wishlist',
+            constraint=models.UniqueConstraint(fields=('user', 'listing'), name='unique_wishlist_item'),
+        ),
+    ]
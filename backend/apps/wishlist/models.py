@@ -1,27 +1,54 @@
-from django.db import models
+from django.db import models, transaction
 from apps.users.models import UserProfile  # Import UserProfile instead of redefining User
 
-class Listing(models.Model):
-    l_id = models.IntegerField(unique=True)  # Keep in sync with your existing IDs
-    title = models.CharField(max_length=255)
-    likes = models.PositiveIntegerField(default=0)
+
+class Wishlist(models.Model):
+    """
+    One saved listing per row; the single source of wishlist state.
+
+    ``UserProfile.wishlist`` is a many-to-many through this table, and the
+    unique (user, listing) constraint is the index every toggle and status
+    check goes through.
+    """
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="wishlist_items")
+    listing = models.ForeignKey("listings.Listing", on_delete=models.CASCADE, related_name="wishlist_entries")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'listing'], name='unique_wishlist_item'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
 
     def __str__(self):
-        return self.title
+        return f"{self.user_id} - {self.listing_id}"
 
+    @classmethod
+    def toggle(cls, user, listing):
+        """
+        Toggle ``listing`` in ``user``'s wishlist and return whether it is now in it.
 
-class Wishlist(models.Model):
-    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="wishlist_items")
-    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="wishlist_entries")
-
-    def toggle_wishlist(self):
-        """Toggle a listing in the user's wishlist and update listing likes."""
-        if self.listing in self.user.wishlist.all():
-            self.user.wishlist.remove(self.listing)
-            self.listing.likes = max(0, self.listing.likes - 1)
-        else:
-            self.user.wishlist.add(self.listing)
-            self.listing.likes += 1
-
-        self.listing.save()
-        self.user.save()
+        Membership is changed with one indexed DELETE or INSERT, and ``likes``
+        moves only when a row actually changed, so concurrent toggles can't
+        double count.
+        """
+        from apps.listings.cache import invalidate_listing, invalidate_owner_stats
+        from apps.listings.models import Listing
+
+        with transaction.atomic():
+            removed, _ = cls.objects.filter(user=user, listing=listing).delete()
+            if removed:
+                Listing.record_like(listing.pk, -1)
+                in_wishlist = False
+            else:
+                _, added = cls.objects.get_or_create(user=user, listing=listing)
+                if added:
+                    Listing.record_like(listing.pk, 1)
+                in_wishlist = True
+        invalidate_owner_stats(listing.owner_id)
+        # record_like's UPDATE skips the post_save cache invalidation
+        l_id = listing.pk
+        transaction.on_commit(lambda: invalidate_listing(l_id))
+        return in_wishlist
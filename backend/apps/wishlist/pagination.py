@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class WishlistCursorPagination(CursorPagination):
+    """Most recently saved first; per user it walks the (user, created_at) index."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
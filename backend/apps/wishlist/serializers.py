@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Listing
+from apps.listings.models import Listing
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
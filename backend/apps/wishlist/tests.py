@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.listings.models import Listing
+from apps.users.models import UserProfile
+
+
+class WishlistViewsTestCase(TestCase):
+    def setUp(self):
+        self.owner = UserProfile.objects.create(
+            uid='owner_1', username='owner', email='owner@example.com', role='owner'
+        )
+        self.hunter = UserProfile.objects.create(
+            uid='hunter_1', username='hunter', email='hunter@example.com', role='hunter'
+        )
+        self.listings = [
+            Listing.objects.create(
+                title=f'Listing {i}', location='Kasarani, Nairobi', price=10000 + i,
+                rating=4, description='', image_urls=['a.jpg'], owner=self.owner,
+            )
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.hunter)
+
+    def test_toggle_updates_membership_and_likes(self):
+        listing = self.listings[0]
+        response = self.client.post(f'/api/wishlist/{listing.l_id}/')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(self.client.get(f'/api/wishlist/check/{listing.l_id}/').json()['in_wishlist'])
+
+        response = self.client.post(f'/api/wishlist/{listing.l_id}/')
+        self.assertEqual(response.json()['in_wishlist'], False)
+        listing.refresh_from_db()
+        self.assertEqual(listing.likes, 0)
+
+    def test_toggle_invalidates_cached_listing_responses(self):
+        cache.clear()
+        listing = self.listings[0]
+        self.assertEqual(self.client.get(f'/api/listings/{listing.l_id}/').json()['likes'], 0)
+        self.assertEqual(self.client.get('/api/listings/').json()[-1]['likes'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/wishlist/{listing.l_id}/')
+        self.assertEqual(self.client.get(f'/api/listings/{listing.l_id}/').json()['likes'], 1)
+        self.assertEqual(self.client.get('/api/listings/').json()[-1]['likes'], 1)
+
+    def test_batch_status_uses_one_query(self):
+        self.hunter.wishlist.add(self.listings[1], self.listings[3])
+        ids = ','.join(str(listing.l_id) for listing in self.listings)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/wishlist/status/?ids={ids}')
+        expected = {str(listing.l_id): i in (1, 3) for i, listing in enumerate(self.listings)}
+        self.assertEqual(response.json()['in_wishlist'], expected)
+
+        response = self.client.post('/api/wishlist/status/', {'ids': [self.listings[1].l_id]}, format='json')
+        self.assertEqual(response.json()['in_wishlist'], {str(self.listings[1].l_id): True})
+        self.assertEqual(self.client.get('/api/wishlist/status/?ids=1,x').status_code, 400)
+
+    def test_get_wishlist_returns_paginated_listing_cards(self):
+        for listing in self.listings:
+            self.hunter.toggle_wishlist(listing)
+
+        # The page, then which of its images have derivatives
+        with self.assertNumQueries(2):
+            body = self.client.get('/api/wishlist/?page_size=3').json()
+        self.assertEqual([item['l_id'] for item in body['results']], [l.l_id for l in self.listings[::-1][:3]])
+        self.assertTrue(body['results'][0]['image_urls'][0].endswith('/uploads/a.jpg'))
+
+        body = self.client.get(body['next']).json()
+        self.assertEqual(len(body['results']), 2)
+        self.assertIsNone(body['next'])
+
+    def test_requires_authentication(self):
+        self.assertEqual(APIClient().get('/api/wishlist/').status_code, 401)
@@ -1,67 +1,66 @@
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404
-from .models import Wishlist
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
 from apps.listings.models import Listing
-# from apps.users.firebase_auth import firebase_auth_required
-import json
+from apps.listings.serializers import ListingSerializer
+from apps.users.clerk_auth import clerk_auth_required
+from .models import Wishlist
+from .pagination import WishlistCursorPagination
+
+# Most listing ids accepted by one status lookup
+MAX_STATUS_IDS = 200
+
 
-# @csrf_exempt
-# @firebase_auth_required
-def toggle_wishlist(request):
+@api_view(['POST'])
+@clerk_auth_required
+def toggle_wishlist(request, listing_id):
     """Add or remove a listing from the user's wishlist."""
-    if request.method == "POST":
-        try:
-            data = json.loads(request.body)
-            l_id = data.get("l_id")
-            if not l_id:
-                return JsonResponse({"error": "Listing ID is required."}, status=400)
-            listing = get_object_or_404(Listing, id=l_id)
-            wishlist_item, created = Wishlist.objects.get_or_create(user=request.user, listing=listing)
-            if not created:
-                wishlist_item.delete()
-                return JsonResponse({"message": "Removed from wishlist"}, status=200)
-            return JsonResponse({"message": "Added to wishlist"}, status=201)
-        except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON data"}, status=400)
-    return JsonResponse({"error": "Invalid request method"}, status=405)
+    listing = get_object_or_404(Listing, l_id=listing_id)
+    if request.user.toggle_wishlist(listing):
+        return Response({"message": "Added to wishlist", "in_wishlist": True}, status=201)
+    return Response({"message": "Removed from wishlist", "in_wishlist": False}, status=200)
 
-# @firebase_auth_required
+
+@api_view(['GET'])
+@clerk_auth_required
 def get_wishlist(request):
-    """Retrieve all listings in the user's wishlist."""
-    wishlist_items = Wishlist.objects.filter(user=request.user).select_related("listing")
-    listings = [
-        {
-            "l_id": item.listing.l_id,
-            "title": item.listing.title,
-            "price": item.listing.price,
-            "image": item.listing.image.url if item.listing.image else None,
-        }
-        for item in wishlist_items
-    ]
-    return JsonResponse({"wishlist": listings}, status=200)
+    """The user's wishlisted listings as full listing cards, newest first, cursor paginated."""
+    items = Wishlist.objects.filter(user=request.user).select_related('listing')
+    paginator = WishlistCursorPagination()
+    page = paginator.paginate_queryset(items, request)
+    serializer = ListingSerializer([item.listing for item in page], many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
+
 
-# @csrf_exempt
-# @firebase_auth_required
+@api_view(['GET'])
+@clerk_auth_required
 def check_wishlist_status(request, listing_id):
     """Check if a listing is in the user's wishlist."""
     exists = Wishlist.objects.filter(user=request.user, listing_id=listing_id).exists()
-    return JsonResponse({"in_wishlist": exists}, status=200)
+    return Response({"in_wishlist": exists}, status=200)
+
+
+@api_view(['GET', 'POST'])
+@clerk_auth_required
+def check_wishlist_statuses(request):
+    """
+    Wishlist membership for many listings in one query.
 
-# from functools import wraps
-# from django.http import JsonResponse
-# from apps.users.firebase_auth import verify_firebase_token
+    Takes ``?ids=1,2,3`` (or ``{"ids": [1, 2, 3]}`` in a POST body) and
+    returns ``{"in_wishlist": {"1": true, "2": false, ...}}``.
+    """
+    raw_ids = request.data.get('ids') if request.method == 'POST' else request.query_params.get('ids', '')
+    if isinstance(raw_ids, str):
+        raw_ids = [value for value in raw_ids.split(',') if value.strip()]
+    try:
+        ids = list(dict.fromkeys(int(value) for value in raw_ids or []))
+    except (TypeError, ValueError):
+        return Response({"error": "ids must be a list of listing ids"}, status=400)
+    if len(ids) > MAX_STATUS_IDS:
+        return Response({"error": f"At most {MAX_STATUS_IDS} ids per request"}, status=400)
 
-# def firebase_auth_required(view_func):
-#     @wraps(view_func)
-#     def wrapper(request, *args, **kwargs):
-#         auth_header = request.headers.get("Authorization")
-#         if not auth_header or not auth_header.startswith("Bearer "):
-#             return JsonResponse({"error": "Authentication required"}, status=401)
-#         id_token = auth_header.split("Bearer ")[1]
-#         user = verify_firebase_token(id_token)
-#         if not user:
-#             return JsonResponse({"error": "Invalid or expired token"}, status=401)
-#         request.user = user
-#         return view_func(request, *args, **kwargs)
-#     return wrapper
+    saved = set(
+        Wishlist.objects.filter(user=request.user, listing_id__in=ids)
+        .values_list('listing_id', flat=True)
+    ) if ids else set()
+    return Response({"in_wishlist": {str(l_id): l_id in saved for l_id in ids}})
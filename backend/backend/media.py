@@ -0,0 +1,165 @@
+"""
+Media file serving that works with DEBUG off.
+
+Files under MEDIA_ROOT are served with strong ETags, Last-Modified, and
+conditional (``If-None-Match``/``If-Modified-Since``) and single byte-range
+requests. Content-hashed upload names (and their derivatives) never change,
+so they get a year-long ``immutable`` Cache-Control. Every response carries
+``X-Content-Type-Options: nosniff`` and anything that isn't a raster image
+type is sent as an attachment, so a stored HTML or SVG file can't run script
+on this origin.
+
+When the app sits behind nginx or Apache, set ``MEDIA_ACCEL_REDIRECT_PREFIX``
+(an nginx ``internal`` location aliased to MEDIA_ROOT) or
+``MEDIA_SENDFILE_HEADER`` (e.g. ``X-Sendfile``) and the web server sends the
+bytes itself. Otherwise full responses go through FileResponse, which the
+WSGI server can hand to ``sendfile``.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from apps.listings.images import HASHED_NAME_RE, INLINE_CONTENT_TYPES
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _is_content_hashed(path):
+    # Derivatives are named <hash>-<width>w.webp after their original
+    name = re.sub(r'-\d+w\.webp$', '', os.path.basename(path))
+    return bool(HASHED_NAME_RE.match(name))
+
+
+def _etag(path, stat):
+    if _is_content_hashed(path):
+        return '"%s-%x"' % (os.path.basename(path), stat.st_size)
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def _byte_range(request, etag, mtime, size):
+    """Return (start, end) for a satisfiable single range, None to send the whole file."""
+    header = request.headers.get('Range')
+    if not header:
+        return None
+
+    if_range = request.headers.get('If-Range')
+    if if_range:
+        if if_range.startswith('"') or if_range.startswith('W/'):
+            if if_range != etag:
+                return None
+        elif parse_http_date_safe(if_range) != int(mtime):
+            return None
+
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges: ignoring Range is always allowed
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        return None
+    if start > end or start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path, document_root=None):
+    """Serve ``path`` from ``document_root`` (MEDIA_ROOT by default)."""
+    document_root = document_root or settings.MEDIA_ROOT
+    try:
+        full_path = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    stat = os.stat(full_path)
+    etag = _etag(path, stat)
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL if _is_content_hashed(path)
+        else f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}",
+        'X-Content-Type-Options': 'nosniff',
+    }
+    if content_type not in INLINE_CONTENT_TYPES:
+        headers['Content-Disposition'] = 'attachment'
+
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '')
+    sendfile_header = getattr(settings, 'MEDIA_SENDFILE_HEADER', '')
+    if accel_prefix or sendfile_header:
+        # The front-end server streams the file and handles Range itself
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if accel_prefix:
+            response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(path.lstrip('/'))
+        else:
+            response[sendfile_header] = full_path
+        return response
+
+    try:
+        byte_range = _byte_range(request, etag, stat.st_mtime, stat.st_size)
+    except ValueError:
+        response = HttpResponse(status=416, headers=headers)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['Content-Length'] = str(stat.st_size)
+        return response
+
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(full_path, start, length), status=206, content_type=content_type, headers=headers
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(length)
+        return response
+
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    for name, value in headers.items():
+        response[name] = value
+    return response
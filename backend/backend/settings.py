@@ -17,6 +17,12 @@ ALLOWED_HOSTS = ["localhost", "127.0.0.1"]
 # Media Files (Uploaded Images)
 MEDIA_URL = '/uploads/'
 MEDIA_ROOT = os.path.join(BASE_DIR, "uploads")
+# Hand media bytes to the front-end server instead of Python: an nginx internal
+# location for X-Accel-Redirect, or a header such as X-Sendfile for Apache
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+MEDIA_SENDFILE_HEADER = os.environ.get('MEDIA_SENDFILE_HEADER', '')
+# Cache lifetime for media that isn't content-hashed (hashed names are immutable)
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 3600))
 
 # Static Files
 STATIC_URL = '/static/'
@@ -117,6 +123,28 @@ DATABASES = {
     }
 }
 
+# Cache Configuration: local memory by default, Redis when REDIS_URL is set
+# (the Redis backend needs the `redis` package installed)
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'micasa',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Seconds a cached public listing response stays valid (writes invalidate it earlier)
+LISTINGS_CACHE_TIMEOUT = int(os.environ.get('LISTINGS_CACHE_TIMEOUT', 300))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -144,5 +172,26 @@ if os.path.exists(FIREBASE_CREDENTIALS_PATH) and not firebase_admin._apps:
 
 # Clerk Configuration
 CLERK_API_KEY = os.environ.get('CLERK_API_KEY', '')
+CLERK_API_URL = os.environ.get('CLERK_API_URL', 'https://api.clerk.dev/v1')
+# Clerk API client: timeouts in seconds, retries per call, and the circuit
+# breaker (open after N consecutive failed calls, retry after M seconds)
+CLERK_CONNECT_TIMEOUT = float(os.environ.get('CLERK_CONNECT_TIMEOUT', 3.05))
+CLERK_READ_TIMEOUT = float(os.environ.get('CLERK_READ_TIMEOUT', 5))
+CLERK_MAX_RETRIES = int(os.environ.get('CLERK_MAX_RETRIES', 2))
+CLERK_BREAKER_THRESHOLD = int(os.environ.get('CLERK_BREAKER_THRESHOLD', 5))
+CLERK_BREAKER_RESET = int(os.environ.get('CLERK_BREAKER_RESET', 30))
 CLERK_JWT_VERIFICATION_KEY = os.environ.get('CLERK_JWT_VERIFICATION_KEY', '')
-CLERK_ISSUER = os.environ.get('CLERK_ISSUER', '')
\ No newline at end of file
+CLERK_ISSUER = os.environ.get('CLERK_ISSUER', '')
+# Clerk signing keys: a JWKS document from a URL or a local file, cached by kid.
+# CLERK_JWT_VERIFICATION_KEY is still used for tokens without a kid.
+CLERK_JWKS_URL = os.environ.get('CLERK_JWKS_URL', '')
+CLERK_JWKS_FILE = os.environ.get('CLERK_JWKS_FILE', '')
+CLERK_AUDIENCE = os.environ.get('CLERK_AUDIENCE', '')
+# Verified tokens kept in memory (until their exp) to skip repeat RSA checks
+CLERK_TOKEN_CACHE_SIZE = int(os.environ.get('CLERK_TOKEN_CACHE_SIZE', 10000))
+# uid -> user lookups cached by the auth middleware: TTL in seconds and the
+# most uids kept per process; set CLERK_USER_CACHE_SHARED=True to also share
+# them through CACHES
+CLERK_USER_CACHE_TTL = int(os.environ.get('CLERK_USER_CACHE_TTL', 30))
+CLERK_USER_CACHE_SIZE = int(os.environ.get('CLERK_USER_CACHE_SIZE', 10000))
+CLERK_USER_CACHE_SHARED = os.environ.get('CLERK_USER_CACHE_SHARED', 'False') == 'True'
@@ -1,8 +1,9 @@
 # backend/backend/urls.py
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from .media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -14,21 +15,20 @@ urlpatterns = [
     path('api/owner/listings/', include('apps.listings.owner_urls')), 
 ]
 
-# Serve media files during development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+# Uploaded media is served by the app in every environment (see backend/media.py);
+# it is also reachable under /api/uploads/ for consistency with frontend expectations
+urlpatterns += [
+    re_path(r'^uploads/(?P<path>.*)$', serve_media),
+    re_path(r'^api/uploads/(?P<path>.*)$', serve_media),
+]
 
-# Also serve uploads directly under /api/uploads/ for consistency with frontend expectations
+# Serve static files during development
 if settings.DEBUG:
     from django.views.static import serve
-    from django.urls import re_path
-    
+
+    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
     urlpatterns += [
-        re_path(r'^api/uploads/(?P<path>.*)$', serve, {
-            'document_root': settings.MEDIA_ROOT,
-        }),
         re_path(r'^api/static/(?P<path>.*)$', serve, {
             'document_root': settings.STATIC_ROOT,
         }),
-    ]
\ No newline at end of file
+    ]
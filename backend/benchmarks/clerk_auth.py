@@ -0,0 +1,95 @@
+"""
+Micro-benchmark for per-request Clerk token verification.
+
+Compares the previous verify_clerk_token (an unverified decode, a verified
+decode and several prints of the payload) with ClerkJWTVerifier on a cold
+claims cache (one RSA verification) and a warm one (cache hit).
+
+Run from the backend directory:  python benchmarks/clerk_auth.py
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from apps.users.clerk_jwt_utils import ClerkJWTVerifier, JWKSKeyStore
+
+ISSUER = "https://example.clerk.accounts.dev"
+ITERATIONS = 2000
+
+
+def legacy_verify(token, public_pem):
+    unverified_payload = jwt.decode(token, options={"verify_signature": False})
+    print(f"Token payload (unverified): {unverified_payload}")
+    payload = jwt.decode(
+        token,
+        public_pem,
+        algorithms=["RS256"],
+        options={"verify_signature": True, "verify_aud": True},
+        audience=unverified_payload.get("aud") or [ISSUER],
+        issuer=unverified_payload.get("iss") or ISSUER,
+    )
+    print(f"Token verified successfully: {payload}")
+    return payload
+
+
+def per_call_us(func):
+    seconds = min(timeit.repeat(func, number=ITERATIONS, repeat=3))
+    return seconds / ITERATIONS * 1e6
+
+
+def main():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": "bench", "use": "sig"})
+
+    token = jwt.encode(
+        {"sub": "user_bench", "iss": ISSUER, "aud": "clerk", "exp": int(time.time()) + 3600, "metadata": {"role": "hunter"}},
+        private_key,
+        algorithm="RS256",
+        headers={"kid": "bench"},
+    )
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump({"keys": [jwk]}, f)
+    try:
+        verifier = ClerkJWTVerifier(JWKSKeyStore(jwks_file=f.name), issuer=ISSUER)
+        verifier.verify_token(token)  # load the JWKS once
+
+        def cold():
+            verifier.claims_cache.clear()
+            verifier.verify_token(token)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            legacy = per_call_us(lambda: legacy_verify(token, public_pem))
+        results = [
+            ("legacy verify_clerk_token", legacy),
+            ("verifier, cold claims cache", per_call_us(cold)),
+            ("verifier, warm claims cache", per_call_us(lambda: verifier.verify_token(token))),
+        ]
+    finally:
+        os.remove(f.name)
+
+    for name, us in results:
+        print(f"{name:<30} {us:10.1f} us/request   ({legacy / us:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark for serializing a large listing page.
+
+Compares ListingSerializer (model instances, every column through its DRF
+field) rendered with JSONRenderer against the ListingRows ``.values()`` fast
+path (plain rows, only decimals and datetimes converted), rendered with
+JSONRenderer and with ListingJSONRenderer (orjson when installed). Both share
+the per-response media base URL and image derivative lookup, so the gap is
+row loading, field conversion and JSON encoding. Each run reads and encodes
+the same 10k listings, each with three images, from an in-memory test
+database.
+
+Run from the backend directory:  python benchmarks/listing_serialization.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from apps.listings import renderers
+from apps.listings.models import Listing
+from apps.listings.serializers import ListingRows, ListingSerializer
+from apps.users.models import UserProfile
+
+ROWS = 10000
+REPEAT = 3
+
+
+def create_fixture():
+    owner = UserProfile.objects.create(uid="bench_owner", username="bench", email="bench@example.com", role="owner")
+    Listing.objects.bulk_create(
+        [
+            Listing(
+                title=f"Listing {i}",
+                location="Kasarani, Nairobi",
+                description="Spacious two bedroom apartment close to the stadium. " * 4,
+                price=10000 + i,
+                rating=4.5,
+                amenities=["Wifi", "Parking", "Gym"],
+                image_urls=[f"{i:064x}-{n}.jpg" for n in range(3)],
+                owner=owner,
+                latitude=-1.2215,
+                longitude=36.8986,
+            )
+            for i in range(ROWS)
+        ],
+        batch_size=1000,
+    )
+
+
+def serializer_path(request):
+    data = ListingSerializer(Listing.objects.all(), many=True, context={"request": request}).data
+    return JSONRenderer().render(data)
+
+
+def rows_path(request, renderer):
+    rows = ListingRows(request)
+    return renderer().render(rows.serialize(rows.values(Listing.objects.all())))
+
+
+def seconds(func):
+    return min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+
+def main():
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        create_fixture()
+        request = APIRequestFactory().get("/api/listings/")
+
+        assert rows_path(request, JSONRenderer) == serializer_path(request)
+        baseline = seconds(lambda: serializer_path(request))
+        results = [
+            ("ListingSerializer + JSONRenderer", baseline),
+            ("ListingRows + JSONRenderer", seconds(lambda: rows_path(request, JSONRenderer))),
+            ("ListingRows + ListingJSONRenderer", seconds(lambda: rows_path(request, renderers.ListingJSONRenderer))),
+        ]
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"{ROWS} listings, orjson {'installed' if renderers.orjson else 'not installed'}")
+    for name, elapsed in results:
+        print(f"{name:<36} {elapsed * 1000:8.1f} ms   ({baseline / elapsed:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()